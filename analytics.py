@@ -0,0 +1,187 @@
+# Score distribution and play statistics for large simulations, kept in fixed-size accumulators.
+#
+# Games stream through as events from batch.BatchGames, chunk by chunk, so memory depends on the
+# chunk size and never on the number of games. Accumulators from different workers (or saved
+# reports) merge exactly.
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch import CHUNK, N_RESOURCES, BatchGames
+from core import CAP, RESOURCES, ROUNDS
+
+MAX_SCORE = CAP * CAP * N_RESOURCES
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+REPORT_FILE = "report.json"
+
+# Each chunk of games yields (round, resources, trades) at the start of every round, where trades
+# marks the games that traded that round, then (ROUNDS + 1, final resources, None)
+def play_events(policy, n, seed=None, chunk=CHUNK):
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    starts = range(0, n, chunk)
+    for start, chunk_seed in zip(starts, seed.spawn(len(starts))):
+        games = BatchGames(min(chunk, n - start), chunk_seed)
+        for round_num in range(1, ROUNDS + 1):
+            resources = games.resources.copy()
+            yield round_num, resources, games.step(policy(games))
+        yield ROUNDS + 1, games.resources, None
+
+class ScoreStats:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.histogram = np.zeros(MAX_SCORE + 1, dtype=np.int64)
+        # Games holding each amount (0..CAP) of each resource at the start of each round,
+        # with row ROUNDS + 1 for the end of the game
+        self.heatmap = np.zeros((ROUNDS + 2, N_RESOURCES, CAP + 1), dtype=np.int64)
+        self.trades = np.zeros(ROUNDS + 1, dtype=np.int64)
+        self.decisions = np.zeros(ROUNDS + 1, dtype=np.int64)
+
+    def consume(self, events):
+        for round_num, resources, trades in events:
+            self.add_round(round_num, resources, trades)
+        return self
+
+    def add_round(self, round_num, resources, trades):
+        cells = resources.astype(np.intp) + np.arange(N_RESOURCES) * (CAP + 1)
+        counts = np.bincount(cells.reshape(-1), minlength=N_RESOURCES * (CAP + 1))
+        self.heatmap[round_num] += counts.reshape(N_RESOURCES, CAP + 1)
+        if trades is not None:
+            self.trades[round_num] += np.count_nonzero(trades)
+            self.decisions[round_num] += len(trades)
+        else:
+            r = resources.astype(np.int16)
+            self.add_scores((r * r).sum(axis=1))
+
+    # Folds in a batch of scores with Chan's update for the mean and sum of squared deviations
+    def add_scores(self, scores):
+        self.histogram += np.bincount(scores, minlength=MAX_SCORE + 1)
+        n = len(scores)
+        if n:
+            batch_mean = float(scores.mean())
+            batch_m2 = float(((scores - batch_mean) ** 2).sum())
+            self.combine(n, batch_mean, batch_m2)
+
+    def combine(self, n, mean, m2):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+
+    def merge(self, other):
+        if other.count:
+            self.combine(other.count, other.mean, other.m2)
+        self.histogram += other.histogram
+        self.heatmap += other.heatmap
+        self.trades += other.trades
+        self.decisions += other.decisions
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    # Scores are integers, so quantiles read straight off the histogram are exact
+    def quantile(self, q):
+        cumulative = np.cumsum(self.histogram)
+        return int(np.searchsorted(cumulative, q * cumulative[-1]))
+
+    def to_report(self):
+        return {
+            "games": self.count,
+            "mean": self.mean,
+            "variance": self.variance,
+            "m2": self.m2,
+            "quantiles": {str(q): self.quantile(q) for q in QUANTILES},
+            "histogram": self.histogram.tolist(),
+            "resources": list(RESOURCES),
+            "heatmap": self.heatmap.tolist(),
+            "trade_share": [trades / decisions if decisions else None
+                            for trades, decisions in zip(self.trades.tolist(), self.decisions.tolist())][1:],
+            "trades": self.trades.tolist(),
+            "decisions": self.decisions.tolist(),
+        }
+
+    @classmethod
+    def from_report(cls, report):
+        stats = cls()
+        stats.count, stats.mean, stats.m2 = report["games"], report["mean"], report["m2"]
+        stats.histogram[:] = report["histogram"]
+        stats.heatmap[:] = report["heatmap"]
+        stats.trades[:] = report["trades"]
+        stats.decisions[:] = report["decisions"]
+        return stats
+
+def save_report(stats, path=REPORT_FILE):
+    with open(path, "w") as f:
+        json.dump(stats.to_report(), f, separators=(",", ":"))
+
+def load_report(path):
+    with open(path) as f:
+        return ScoreStats.from_report(json.load(f))
+
+def analyse_shard(spec, games, seed, shard):
+    from tournament import resolve_policy
+
+    shard_seed = np.random.SeedSequence(seed, spawn_key=(shard,))
+    return ScoreStats().consume(play_events(resolve_policy(spec), games, shard_seed))
+
+def analyse(spec, games, seed=0, workers=None, shards=None):
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers * 4
+    sizes = [games // shards + (i < games % shards) for i in range(shards)]
+    stats = ScoreStats()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(analyse_shard, spec, size, seed, shard)
+                   for shard, size in enumerate(sizes) if size]
+        for future in futures:
+            stats.merge(future.result())
+    return stats
+
+def summary(stats):
+    lines = [f"{stats.count:,} games, mean score {stats.mean:.3f}, std {math.sqrt(stats.variance):.3f}",
+             "quantiles " + "  ".join(f"{q:g}: {stats.quantile(q)}" for q in QUANTILES),
+             "",
+             f"{'round':<7}{'trade %':>8}  mean held " + "".join(f"{name:>7}" for name in RESOURCES)]
+    amounts = np.arange(CAP + 1)
+    for round_num in range(1, ROUNDS + 2):
+        held = stats.heatmap[round_num] @ amounts / max(1, stats.heatmap[round_num, 0].sum())
+        if round_num <= ROUNDS and stats.decisions[round_num]:
+            label, share = str(round_num), f"{100 * stats.trades[round_num] / stats.decisions[round_num]:.1f}"
+        else:
+            label, share = "end", "-"
+        lines.append(f"{label:<7}{share:>8}  {'':10}" + "".join(f"{value:>7.2f}" for value in held))
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Stream simulated games into a score-distribution report")
+    parser.add_argument("--policy", default="greedy", help="policy name or module:function")
+    parser.add_argument("-n", "--games", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("-o", "--output", default=REPORT_FILE, help="report file to write")
+    parser.add_argument("--merge", nargs="+", metavar="REPORT", help="combine existing reports instead of simulating")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.merge:
+        stats = ScoreStats()
+        for path in args.merge:
+            stats.merge(load_report(path))
+    else:
+        stats = analyse(args.policy, args.games, args.seed, args.workers)
+    elapsed = time.perf_counter() - start
+
+    save_report(stats, args.output)
+    print(summary(stats))
+    print()
+    print(f"{stats.count:,} games in {elapsed:.2f}s, report written to {args.output}")
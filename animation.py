@@ -0,0 +1,97 @@
+from assets import FRONT, BACK, LEFT, RIGHT, WALKING_1, STILL, WALKING_2
+
+# The walk the old frame-by-frame animations played: 5 px per 100 ms frame
+WALK_SPEED = 50
+STEP = 5
+TURN_TIME = 0.1
+WALK_CYCLE = (WALKING_1, STILL, WALKING_2)
+
+# Corners between one stall and the next; the end points come from stall_character_positions
+WALK_PATHS = {
+    1: [(100, 145), (100, 280)],
+    2: [(35, 385)],
+    3: [(75, 320)],
+    4: [(155, 360), (250, 360), (250, 310)],
+    5: [(415, 310), (415, 180)],
+    6: [(430, 410)],
+    7: [(425, 310)],
+    8: [(250, 310), (250, 360), (155, 360), (155, 330), (35, 330)],
+    9: [(100, 280), (100, 145)],
+}
+
+def facing(start, end):
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    if abs(dx) >= abs(dy):
+        return RIGHT if dx > 0 else LEFT
+    return FRONT if dy > 0 else BACK
+
+def waypoints(stall_character_positions, stall_index):
+    if stall_index not in WALK_PATHS:
+        return []
+    start = stall_character_positions[stall_index - 1][1]
+    end = stall_character_positions[stall_index][1]
+    return [start] + WALK_PATHS[stall_index] + [end]
+
+# One walk along a waypoint list. Each leg is a short turn on the spot followed by
+# straight-line movement, so position and frame are pure functions of elapsed time.
+class Walk:
+    def __init__(self, points):
+        self.legs = []
+        self.end = points[-1] if points else None
+        elapsed = 0.0
+        for start, end in zip(points, points[1:]):
+            length = abs(end[0] - start[0]) + abs(end[1] - start[1])
+            if length == 0:
+                continue
+            duration = TURN_TIME + length / WALK_SPEED
+            self.legs.append((elapsed, duration, start, end, length, facing(start, end)))
+            elapsed += duration
+        self.duration = elapsed
+        self.final_direction = self.legs[-1][5] if self.legs else None
+
+    # (direction, state, pos) at t seconds into the walk
+    def frame(self, t):
+        for leg_start, duration, start, end, length, direction in self.legs:
+            if t < leg_start + duration:
+                moving = max(0.0, t - leg_start - TURN_TIME)
+                distance = min(length, moving * WALK_SPEED)
+                fraction = distance / length
+                pos = (round(start[0] + (end[0] - start[0]) * fraction),
+                       round(start[1] + (end[1] - start[1]) * fraction))
+                if moving == 0:
+                    return direction, STILL, pos
+                return direction, WALK_CYCLE[int(distance // STEP) % 3], pos
+        return self.final_direction, STILL, self.end
+
+# Advances at most one walk at a time from a clock the caller supplies
+class Animator:
+    def __init__(self, speed=1.0, enabled=True):
+        self.speed = speed
+        self.enabled = enabled
+        self.walk = None
+        self.started = 0.0
+
+    @property
+    def active(self):
+        return self.walk is not None
+
+    def start(self, points, now):
+        walk = Walk(points)
+        if not self.enabled or not walk.legs:
+            self.walk = None
+            return
+        self.walk = walk
+        self.started = now
+
+    def skip(self):
+        self.walk = None
+
+    # Current frame, or None once the walk has finished
+    def update(self, now):
+        if self.walk is None:
+            return None
+        t = (now - self.started) * self.speed
+        if t >= self.walk.duration:
+            self.walk = None
+            return None
+        return self.walk.frame(t)
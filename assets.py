@@ -0,0 +1,164 @@
+import pygame
+
+FRONT = 0
+BACK = 1
+LEFT = 2
+RIGHT = 4
+
+WALKING_1 = 0
+STILL = 1
+WALKING_2 = 2
+
+ICON_SIZE = (30, 30)
+STALL_SIZE = (80, 80)
+
+BACKGROUND_IMAGE = "images/bg.jpg"
+
+RESOURCE_IMAGES = {
+    "wood": "images/wood.png",
+    "bread": "images/bread.png",
+    "stone": "images/stone.png",
+    "gold": "images/gold.png",
+    "sheep": "images/sheep.png",
+    "stall": "images/stall.png"
+}
+
+def setup_sprite():
+    spriteImages = [[0 for x in range(3)] for y in range(5)]
+
+    #front
+    spriteImages[FRONT][WALKING_1] = ('images/sprite/walking_front_1.png')
+    spriteImages[FRONT][STILL] = ('images/sprite/still_front.png')
+    spriteImages[FRONT][WALKING_2] = ('images/sprite/walking_front_2.png')
+
+    #back
+    spriteImages[BACK][WALKING_1] = ('images/sprite/walking_back_1.png')
+    spriteImages[BACK][STILL] = ('images/sprite/still_back.png')
+    spriteImages[BACK][WALKING_2] = ('images/sprite/walking_back_2.png')
+
+    #left
+    spriteImages[LEFT][WALKING_1] = ('images/sprite/walking_left_1.png')
+    spriteImages[LEFT][STILL] = ('images/sprite/still_left.png')
+    spriteImages[LEFT][WALKING_2] = ('images/sprite/walking_left_2.png')
+
+    #right
+    spriteImages[RIGHT][WALKING_1] = ('images/sprite/walking_right_1.png')
+    spriteImages[RIGHT][STILL] = ('images/sprite/still_right.png')
+    spriteImages[RIGHT][WALKING_2] = ('images/sprite/walking_right_2.png')
+
+    return spriteImages
+
+def scaled_size(size, scale):
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+# Loads, scales and converts every image once; everything after that is a dict lookup.
+# For a window bigger or smaller than the layout, set_scale() makes one smoothscaled copy of
+# each image per window size, so nothing is scaled while drawing.
+class Assets:
+    def __init__(self, screen_size, use_atlas=True):
+        self.screen_size = screen_size
+        self.use_atlas = use_atlas
+        self.disk_loads = 0
+        self.images = {}
+        self.sprites = setup_sprite()
+        self.paths = {"bg": BACKGROUND_IMAGE, "stall_large": RESOURCE_IMAGES["stall"], **RESOURCE_IMAGES}
+        for direction, row in enumerate(self.sprites):
+            for state, path in enumerate(row):
+                if path:
+                    self.paths[f"sprite:{direction}:{state}"] = path
+        self.scale = 1.0
+        # (key, size) -> scaled copy, and the full-size source images they are made from, by path
+        self.scaled = {}
+        self.originals = {}
+        self.load_all()
+        self.logical = dict(self.images)
+        for direction, row in enumerate(self.sprites):
+            for state, image in enumerate(row):
+                if image:
+                    self.logical[f"sprite:{direction}:{state}"] = image
+
+    def _load(self, path, size, alpha=True):
+        self.disk_loads += 1
+        image = pygame.image.load(path)
+        image = pygame.transform.scale(image, size)
+        return image.convert_alpha() if alpha else image.convert()
+
+    def load_all(self):
+        if not (self.use_atlas and self.load_from_atlas()):
+            self.load_from_files()
+        self.images["bg"] = self._load(BACKGROUND_IMAGE, self.screen_size, alpha=False)
+
+    def load_from_files(self):
+        for name, path in RESOURCE_IMAGES.items():
+            self.images[name] = self._load(path, ICON_SIZE)
+        self.images["stall_large"] = self._load(RESOURCE_IMAGES["stall"], STALL_SIZE)
+
+        for direction, row in enumerate(self.sprites):
+            for state, path in enumerate(row):
+                if path:
+                    self.sprites[direction][state] = self._load(path, ICON_SIZE)
+
+    # One mapped, pre-scaled sheet; every icon and sprite frame is a subsurface of it.
+    # Returns False when the atlas can't be read or written.
+    def load_from_atlas(self):
+        from atlas import load_atlas
+
+        raw_sheet, rects, mm = load_atlas() or (None, None, None)
+        if raw_sheet is None:
+            return False
+        self.disk_loads += 1
+        self.sheet = raw_sheet.convert_alpha()
+        del raw_sheet
+        mm.close()
+
+        for key, rect in rects.items():
+            image = self.sheet.subsurface(rect)
+            if key.startswith("sprite:"):
+                _, direction, state = key.split(":")
+                self.sprites[int(direction)][int(state)] = image
+            else:
+                self.images[key] = image
+        return True
+
+    # Scaling from the source files keeps icons sharp when the window is larger than the layout
+    def original(self, key):
+        path = self.paths[key]
+        image = self.originals.get(path)
+        if image is None:
+            self.disk_loads += 1
+            image = pygame.image.load(path)
+            image = image.convert() if key == "bg" else image.convert_alpha()
+            self.originals[path] = image
+        return image
+
+    def set_scale(self, scale):
+        current = {}
+        for key, image in self.logical.items():
+            size = scaled_size(image.get_size(), scale)
+            if size == image.get_size():
+                current[key] = image
+                continue
+            if (key, size) not in self.scaled:
+                self.scaled[key, size] = pygame.transform.smoothscale(self.original(key), size)
+            current[key] = self.scaled[key, size]
+        # Copies made for any other window size won't be drawn again
+        for key, size in list(self.scaled):
+            if current[key] is not self.scaled[key, size]:
+                del self.scaled[key, size]
+        self.scale = scale
+
+        for key, image in current.items():
+            if key.startswith("sprite:"):
+                _, direction, state = key.split(":")
+                self.sprites[int(direction)][int(state)] = image
+            else:
+                self.images[key] = image
+
+    def get(self, key):
+        return self.images[key]
+
+    def resource(self, name):
+        return self.images[name]
+
+    def sprite(self, direction, state):
+        return self.sprites[direction][state]
@@ -0,0 +1,125 @@
+import json
+import mmap
+import os
+import struct
+
+import pygame
+
+from assets import ICON_SIZE, STALL_SIZE, RESOURCE_IMAGES, setup_sprite
+
+ATLAS_CACHE = "images/atlas.bin"
+ATLAS_WIDTH = 256
+MAGIC = b"RGATLAS1"
+HEADER = struct.Struct("<8sI")
+
+def atlas_sources():
+    # (key, path, size) for everything packed into the atlas
+    sources = []
+    for direction, row in enumerate(setup_sprite()):
+        for state, path in enumerate(row):
+            if path:
+                sources.append((f"sprite:{direction}:{state}", path, ICON_SIZE))
+    for name, path in RESOURCE_IMAGES.items():
+        sources.append((name, path, ICON_SIZE))
+    sources.append(("stall_large", RESOURCE_IMAGES["stall"], STALL_SIZE))
+    return sources
+
+def fingerprint(sources):
+    stamp = []
+    for key, path, size in sources:
+        st = os.stat(path)
+        stamp.append([key, path, list(size), st.st_size, st.st_mtime_ns])
+    return stamp
+
+# Shelf packing: tallest first, left to right, new row when the current one is full
+def pack(sizes, width=ATLAS_WIDTH):
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i][1])
+    rects = [None] * len(sizes)
+    x = y = row_height = 0
+    for i in order:
+        w, h = sizes[i]
+        if x + w > width:
+            x, y = 0, y + row_height
+            row_height = 0
+        rects[i] = (x, y, w, h)
+        x += w
+        row_height = max(row_height, h)
+    return rects, (width, y + row_height)
+
+def build_atlas(path=ATLAS_CACHE):
+    sources = atlas_sources()
+    rects, size = pack([size for _, _, size in sources])
+
+    sheet = pygame.Surface(size, pygame.SRCALPHA)
+    for (key, image_path, image_size), rect in zip(sources, rects):
+        image = pygame.transform.scale(pygame.image.load(image_path), image_size)
+        sheet.blit(image, rect[:2])
+
+    manifest = {
+        "size": list(size),
+        "rects": {key: list(rect) for (key, _, _), rect in zip(sources, rects)},
+        "sources": fingerprint(sources),
+    }
+    header = json.dumps(manifest).encode()
+    # Pad so the pixel block starts on a 4-byte boundary
+    header += b" " * (-(HEADER.size + len(header)) % 4)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(header)))
+        f.write(header)
+        f.write(pygame.image.tobytes(sheet, "RGBA"))
+    os.replace(tmp_path, path)
+    return manifest
+
+# Raises ValueError or struct.error for a cut-off or damaged header
+def read_manifest(mm):
+    magic, header_len = HEADER.unpack_from(mm, 0)
+    if magic != MAGIC:
+        return None, 0
+    if len(mm) < HEADER.size + header_len:
+        raise ValueError("atlas header is cut off")
+    manifest = json.loads(bytes(mm[HEADER.size:HEADER.size + header_len]))
+    return manifest, HEADER.size + header_len
+
+# Maps the cache file and wraps its pixels in one Surface without decoding anything.
+# Returns (surface, rects, mmap); the mmap must outlive the surface. Returns None when the
+# cache is stale, empty, cut off or otherwise damaged, so that it gets rebuilt.
+def open_atlas(path=ATLAS_CACHE):
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None
+    try:
+        manifest, offset = read_manifest(mm)
+        stale = manifest is None or manifest["sources"] != fingerprint(atlas_sources())
+        if not stale:
+            size = tuple(manifest["size"])
+            stale = len(mm) < offset + size[0] * size[1] * 4
+    except (ValueError, struct.error, KeyError, TypeError):
+        stale = True
+    if stale:
+        mm.close()
+        return None
+    pixels = memoryview(mm)[offset:offset + size[0] * size[1] * 4]
+    sheet = pygame.image.frombuffer(pixels, size, "RGBA")
+    return sheet, manifest["rects"], mm
+
+# Returns None when there is no usable cache and one can't be written (a read-only install);
+# the cache is only a speed-up, so callers then decode the source images instead
+def load_atlas(path=ATLAS_CACHE):
+    try:
+        atlas = None
+        if os.path.exists(path):
+            atlas = open_atlas(path)
+        if atlas is None:
+            build_atlas(path)
+            atlas = open_atlas(path)
+    except OSError:
+        return None
+    return atlas
+
+if __name__ == "__main__":
+    manifest = build_atlas()
+    print(f"Packed {len(manifest['rects'])} images into {ATLAS_CACHE} ({manifest['size'][0]}x{manifest['size'][1]})")
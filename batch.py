@@ -0,0 +1,202 @@
+# The core rules applied to many games at once as NumPy arrays
+import time
+
+import numpy as np
+
+from core import CAP, ROUNDS, START_RESOURCES, TRADE, apply_action, can_collect, can_trade, score
+
+N_RESOURCES = len(START_RESOURCES)
+
+# Offer columns, in the same order as core offers
+OFFER_COLLECT, OFFER_FROM, OFFER_TO, OFFER_AMOUNT, OFFER_TO_AMOUNT = range(5)
+
+# Bitmask of non-empty resources -> how many there are, and the k-th one of them
+MASK_BITS = (1 << np.arange(N_RESOURCES)).astype(np.float32)
+NON_EMPTY_COUNT = np.array([bin(mask).count("1") for mask in range(1 << N_RESOURCES)], dtype=np.float64)
+NTH_NON_EMPTY = np.array([[([i for i in range(N_RESOURCES) if mask >> i & 1] + [0] * N_RESOURCES)[k]
+                           for k in range(N_RESOURCES)] for mask in range(1 << N_RESOURCES)], dtype=np.int8).reshape(-1)
+
+# Splits one uniform in [0, 1) into a draw from range(k) and a fresh uniform for the next draw
+def split_uniform(u, k):
+    u *= k
+    digit = u.astype(np.int8)
+    u -= digit
+    # u * k can round up to exactly k when u is within an ulp of 1
+    return np.minimum(digit, np.asarray(k, dtype=np.int8) - 1, out=digit)
+
+# N games in lockstep: an (N, 5) int8 resource matrix, an (N, 5) int8 offer matrix
+# and a per-game round counter. Policies are functions of the batch returning an
+# (N,) array of COLLECT/TRADE.
+#
+# Offers, redraws and policies each get their own random stream, so every game sees the
+# same first draw each round whatever the policy does: runs with the same seed share
+# their random numbers as far as the games allow.
+class BatchGames:
+    def __init__(self, n, seed=None):
+        self.n = n
+        self.resources = np.empty((n, N_RESOURCES), dtype=np.int8)
+        self.offers = np.zeros((n, 5), dtype=np.int8)
+        self.round = np.empty(n, dtype=np.int8)
+        self.rows = np.arange(n)
+        self.cells = self.rows * N_RESOURCES
+        self.reset(seed)
+
+    # Starts every game over in the existing arrays
+    def reset(self, seed=None):
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed = seed
+        self.rng, self.retry_rng, self.policy_rng = (np.random.default_rng(s) for s in seed.spawn(3))
+        self.resources[:] = START_RESOURCES
+        self.round[:] = 1
+        self.draw_offers()
+
+    @property
+    def over(self):
+        return bool((self.round > ROUNDS).all())
+
+    # Resource amounts picked out per game by an (N,) column array
+    def held(self, columns, rows=None):
+        cells = self.cells if rows is None else self.cells[rows]
+        return self.resources.reshape(-1)[cells + columns]
+
+    def legal_collect(self):
+        return self.held(self.offers[:, OFFER_COLLECT]) < CAP
+
+    def legal_trade(self):
+        offers = self.offers
+        return (self.held(offers[:, OFFER_FROM]) >= offers[:, OFFER_AMOUNT]) & \
+               (self.held(offers[:, OFFER_TO]) + offers[:, OFFER_TO_AMOUNT] <= CAP)
+
+    # Same draws as core.draw_offer_rejection: collect uniform over all resources, trade_from uniform
+    # over the non-empty ones, trade_to over the other four, then both amounts. Only the
+    # rows where both options came out impossible are redrawn.
+    # One 64-bit draw per game is split into all five choices (about 10 of its 53 bits are used).
+    # trade_to is drawn as a slot among the four resources other than trade_from.
+    def draw_offers(self, rows=None):
+        everything = rows is None
+        rows = self.rows if rows is None else rows
+        rng = self.rng
+        while len(rows):
+            resources = self.resources if everything else self.resources[rows]
+            raw = rng.bit_generator.random_raw(len(rows)) >> np.uint64(11)
+            u = raw.astype(np.float64)
+            u *= 1.0 / (1 << 53)
+
+            # Choices that don't depend on the resources come first, so they stay the same
+            # for a game however earlier rounds went
+            collect = split_uniform(u, N_RESOURCES)
+            trade_to_amount = split_uniform(u, 3) + 2
+            trade_to = split_uniform(u, N_RESOURCES - 1)
+
+            mask = ((resources > 0) @ MASK_BITS).astype(np.intp)
+            trade_from = NTH_NON_EMPTY[mask * N_RESOURCES + split_uniform(u, NON_EMPTY_COUNT[mask])]
+            trade_to += trade_to >= trade_from
+
+            flat = resources.reshape(-1)
+            cells = self.cells if everything else self.cells[:len(rows)]
+            top = np.minimum(3, flat[cells + trade_from])
+            trade_amount = split_uniform(u, top) + 1
+
+            offers = np.stack((collect, trade_from, trade_to, trade_amount, trade_to_amount), axis=1)
+            if everything:
+                self.offers[:] = offers
+            else:
+                self.offers[rows] = offers
+
+            impossible = (flat[cells + collect] == CAP) & (flat[cells + trade_to] + trade_to_amount > CAP)
+            rows = rows[impossible]
+            everything = False
+            rng = self.retry_rng
+
+    # Applies one action per game. A choice that is impossible for a game falls back to the
+    # other option, which the offer generator guarantees is possible.
+    def step(self, actions, active=None):
+        active = self.round <= ROUNDS if active is None else active
+        collect_ok = self.legal_collect()
+        trade = ((np.asarray(actions) == TRADE) & self.legal_trade()) | ~collect_ok
+        collect = active & ~trade
+        trade &= active
+
+        # Every game gets all three updates, scaled to zero where they don't apply
+        offers = self.offers
+        flat = self.resources.reshape(-1)
+        cells = self.cells
+        flat[cells + offers[:, OFFER_COLLECT]] += collect
+        traded = trade.view(np.int8)
+        flat[cells + offers[:, OFFER_FROM]] -= offers[:, OFFER_AMOUNT] * traded
+        flat[cells + offers[:, OFFER_TO]] += offers[:, OFFER_TO_AMOUNT] * traded
+
+        self.round += active
+        playing = self.round <= ROUNDS
+        if playing.all():
+            self.draw_offers()
+        elif playing.any():
+            self.draw_offers(self.rows[playing])
+        return trade
+
+    def scores(self):
+        r = self.resources.astype(np.int16)
+        return (r * r).sum(axis=1)
+
+# Batches of this size stay in cache; bigger runs are played one chunk after another
+CHUNK = 65536
+
+def run(policy, n, seed=None, chunk=CHUNK):
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    scores = np.empty(n, dtype=np.int16)
+    starts = range(0, n, chunk)
+    for start, chunk_seed in zip(starts, seed.spawn(len(starts))):
+        games = BatchGames(min(chunk, n - start), chunk_seed)
+        while not games.over:
+            games.step(policy(games))
+        scores[start:start + games.n] = games.scores()
+    return scores
+
+# Plays n games and replays every recorded offer and action through the scalar rules in core
+def check_against_core(policy, n, seed=None):
+    games = BatchGames(n, seed)
+    offers, actions = [], []
+    while not games.over:
+        offers.append(games.offers.copy())
+        actions.append(games.step(policy(games)).astype(np.int8))
+    batch_scores = games.scores()
+
+    for game in range(n):
+        resources = START_RESOURCES
+        for offer_table, action_table in zip(offers, actions):
+            offer = tuple(int(x) for x in offer_table[game])
+            action = int(action_table[game])
+            legal = can_trade if action == TRADE else can_collect
+            if not (can_collect(resources, offer) or can_trade(resources, offer)) or not legal(resources, offer):
+                return False, f"game {game}: impossible offer or action {offer}, {action} at {resources}"
+            resources = apply_action(resources, offer, action)
+        if resources != tuple(int(x) for x in games.resources[game]) or score(resources) != batch_scores[game]:
+            return False, f"game {game}: core gives {resources}, batch gives {games.resources[game]}"
+    return True, f"{n} games match core"
+
+if __name__ == "__main__":
+    import argparse
+
+    from policies import POLICIES
+
+    parser = argparse.ArgumentParser(description="Batch-simulate games with a vectorized policy")
+    parser.add_argument("-n", "--games", type=int, default=1_000_000)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="greedy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", type=int, default=2000, help="games to cross-check against core (0 to skip)")
+    args = parser.parse_args()
+
+    policy = POLICIES[args.policy]
+    if args.check:
+        ok, message = check_against_core(policy, args.check, args.seed)
+        print(message)
+        if not ok:
+            raise SystemExit(1)
+
+    start = time.perf_counter()
+    scores = run(policy, args.games, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"{args.games:,} games in {elapsed:.2f}s ({args.games / elapsed:,.0f} games/s), "
+          f"{args.policy} mean score {scores.mean():.3f}")
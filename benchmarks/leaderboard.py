@@ -0,0 +1,56 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from leaderboard import Leaderboard, connect
+
+def timed(function, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark leaderboard inserts and queries")
+    parser.add_argument("-n", "--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    # Roughly the spread of real games
+    scores = [max(0, min(500, round(rng.gauss(110, 30)))) for _ in range(args.rows)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        board = Leaderboard(os.path.join(directory, "bench.db"))
+
+        # submit() is what the game calls; it should never wait for the disk
+        start = time.perf_counter()
+        worst = 0.0
+        for i, score in enumerate(scores):
+            call = time.perf_counter()
+            board.submit(score, i)
+            worst = max(worst, time.perf_counter() - call)
+        queued = time.perf_counter() - start
+        board.flush()
+        written = time.perf_counter() - start
+        print(f"{args.rows:,} submits: {args.rows / queued:,.0f}/s queued (slowest call {worst * 1e3:.2f} ms), "
+              f"{args.rows / written:,.0f}/s written to disk")
+
+        probes = [rng.randrange(501) for _ in range(1000)]
+        print(f"rank (in memory)      {timed(lambda: board.rank(rng.choice(probes)), 10000):>10.1f} us")
+        print(f"percentile            {timed(lambda: board.percentile(rng.choice(probes)), 10000):>10.1f} us")
+        print(f"top 10 (index)        {timed(lambda: board.top(10), 1000):>10.1f} us")
+
+        db = connect(os.path.join(directory, "bench.db"))
+        print(f"rank from score_counts{timed(lambda: db.execute('SELECT 1 + COALESCE(SUM(count), 0) FROM score_counts WHERE score > ?', (rng.choice(probes),)).fetchone(), 1000):>10.1f} us")
+        print(f"rank by COUNT(*)      {timed(lambda: db.execute('SELECT 1 + COUNT(*) FROM scores WHERE score > ?', (rng.choice(probes),)).fetchone(), 20):>10.1f} us")
+        db.close()
+        board.close()
+
+if __name__ == "__main__":
+    main()
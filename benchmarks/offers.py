@@ -0,0 +1,84 @@
+import math
+import os
+import random
+import sys
+import time
+import zlib
+from collections import Counter
+from fractions import Fraction
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core import START_RESOURCES, can_collect, can_trade, draw_offer, draw_offer_rejection
+
+# From the start, mid-game, and right up against the cap where the old loop retries most
+STATES = [
+    START_RESOURCES,
+    (4, 3, 2, 1, 0),
+    (10, 2, 0, 0, 1),
+    (10, 10, 9, 1, 0),
+    (10, 10, 10, 8, 2),
+    (10, 9, 10, 10, 1),
+]
+SAMPLES = 200_000
+
+# Exact offer probabilities of the original generator, rejection included
+def exact_distribution(resources):
+    n = len(resources)
+    non_empty = [res for res in range(n) if resources[res] > 0]
+    weights = {}
+    for collect in range(n):
+        for trade_from in non_empty:
+            top = min(3, resources[trade_from])
+            for trade_to in range(n):
+                if trade_to == trade_from:
+                    continue
+                for trade_amount in range(1, top + 1):
+                    for trade_to_amount in range(2, 5):
+                        offer = (collect, trade_from, trade_to, trade_amount, trade_to_amount)
+                        if can_collect(resources, offer) or can_trade(resources, offer):
+                            weights[offer] = Fraction(1, n * len(non_empty) * (n - 1) * top * 3)
+    total = sum(weights.values())
+    return {offer: float(weight / total) for offer, weight in weights.items()}
+
+# Upper tail of the chi-square distribution (Wilson-Hilferty approximation)
+def chi_square_p(statistic, dof):
+    z = ((statistic / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / math.sqrt(2 / (9 * dof))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def goodness_of_fit(counts, expected, samples):
+    statistic = 0.0
+    for offer, p in expected.items():
+        statistic += (counts.get(offer, 0) - p * samples) ** 2 / (p * samples)
+    impossible = sum(count for offer, count in counts.items() if offer not in expected)
+    return statistic, len(expected) - 1, impossible
+
+def time_sampler(sampler, resources, draws=20_000):
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(draws):
+        sampler(resources, rng)
+    return (time.perf_counter() - start) / draws * 1e6
+
+def main():
+    failed = False
+    print(f"{'state':<22}{'sampler':<11}{'chi2':>10}{'dof':>6}{'p':>8}{'us/draw':>10}")
+    for resources in STATES:
+        expected = exact_distribution(resources)
+        for name, sampler in (("rejection", draw_offer_rejection), ("table", draw_offer)):
+            # Fixed seeds, so a run can be repeated (str hashes change every run)
+            rng = random.Random(zlib.crc32(repr((name, resources)).encode()))
+            counts = Counter(sampler(resources, rng) for _ in range(SAMPLES))
+            statistic, dof, impossible = goodness_of_fit(counts, expected, SAMPLES)
+            p = chi_square_p(statistic, dof)
+            micros = time_sampler(sampler, resources)
+            print(f"{str(resources):<22}{name:<11}{statistic:>10.1f}{dof:>6}{p:>8.3f}{micros:>10.2f}")
+            # Each of the 12 tests is run at 0.1%, so a false alarm is rare
+            if impossible or p < 0.001:
+                failed = True
+    print("distributions match" if not failed else "MISMATCH")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
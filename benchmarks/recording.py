@@ -0,0 +1,96 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import game
+from animation import Walk, waypoints
+from capture import FORMATS, Recorder
+from render import RESOURCES, idle_frame, scene
+
+MODES = ("off",) + FORMATS
+ROUNDS = 2
+
+# Plays the walks in real time, as main() would, and returns the game thread's cost of each
+# frame: drawing plus, when recording, handing the frame to the recorder. The writer thread
+# gets the time the game loop spends waiting for the next frame.
+def play(renderer, buttons, stalls, fps, recorder):
+    costs = []
+    for stall_index in stalls:
+        path = Walk(waypoints(game.STALL_CHARACTER_POSITIONS, stall_index))
+        renderer.invalidate()
+        idle_frame(renderer, buttons)
+        next_frame = time.perf_counter()
+        for frame in range(int(path.duration * fps) + 1):
+            direction, pose, pos = path.frame(frame / fps)
+            start = time.perf_counter()
+            rects = renderer.draw_frame(RESOURCES, stall_index, game.ASSETS.sprite(direction, pose), pos, buttons)
+            if recorder is not None:
+                recorder.capture(game.screen, rects)
+            costs.append(time.perf_counter() - start)
+            next_frame += 1 / fps
+            delay = next_frame - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    return costs
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, len(values) * p // 100)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure what frame capture costs the game loop")
+    parser.add_argument("--walks", default="2,3", help="comma-separated stalls to walk to")
+    parser.add_argument("--fps", type=int, default=game.TARGET_FPS, help="frame rate the walks are paced at")
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="times to alternate between the modes")
+    args = parser.parse_args()
+
+    stalls = [int(stall) for stall in args.walks.split(",")]
+    renderer, buttons = scene()
+    costs = {mode: [] for mode in MODES}
+    written = {mode: [0, 0, 0] for mode in FORMATS}
+    directory = tempfile.mkdtemp()
+    try:
+        # Modes take turns, so a slow patch on the machine doesn't land on just one of them
+        for _ in range(args.rounds):
+            for mode in MODES:
+                recorder = None
+                if mode != "off":
+                    target = os.path.join(directory, mode)
+                    shutil.rmtree(target, ignore_errors=True)
+                    recorder = Recorder(target, game.screen.get_size(), mode)
+                costs[mode] += play(renderer, buttons, stalls, args.fps, recorder)
+                if recorder is not None:
+                    recorder.close()
+                    totals = written[mode]
+                    totals[0] += recorder.written
+                    totals[1] += recorder.dropped
+                    totals[2] += recorder.bytes_written
+    finally:
+        shutil.rmtree(directory)
+
+    # The extra cost per frame, also as a share of the time one frame may take
+    baseline = sum(costs["off"]) / len(costs["off"])
+    print(f"{len(costs['off'])} frames per mode at {args.fps} fps")
+    print(f"{'mode':<8}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'max us':>10}{'extra us':>10}{'budget':>9}"
+          f"{'written':>9}{'dropped':>9}{'KiB/frame':>11}")
+    for mode in MODES:
+        times = costs[mode]
+        mean = sum(times) / len(times)
+        line = (f"{mode:<8}{mean * 1e6:>10.0f}{percentile(times, 50) * 1e6:>10.0f}"
+                f"{percentile(times, 99) * 1e6:>10.0f}{max(times) * 1e6:>10.0f}{(mean - baseline) * 1e6:>+10.0f}"
+                f"{100 * (mean - baseline) * args.fps:>+8.2f}%")
+        if mode in written:
+            frames, dropped, size = written[mode]
+            line += f"{frames:>9}{dropped:>9}{size / 1024 / max(1, frames):>11.1f}"
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+
+import game
+from animation import WALK_PATHS, Walk, waypoints
+from assets import STILL
+
+RESULTS_FILE = "render_bench.json"
+REPEATS = 7
+# Blit speed varies from one process to the next, so each case keeps its best result over
+# several fresh processes
+RUNS = 3
+ALLOCATION_CALLS = 50
+WALK_FPS = 60
+# Slower by more than this many percent counts as a regression
+THRESHOLD = 10.0
+
+RESOURCES = {"bread": 4, "wood": 7, "stone": 3, "gold": 10, "sheep": 0}
+
+# The window, buttons and renderer exactly as main() sets them up
+def scene():
+    game.init_display()
+    collect_button = game.Button(135, game.SCREEN_HEIGHT - 135, 150, 50, game.EARTHY_BROWN, game.WHITE, "collect")
+    trade_button = game.Button(50, game.SCREEN_HEIGHT - 75, 300, 50, game.EARTHY_BROWN, game.WHITE, "trade")
+    # The largest offer there is: four icons in, three out
+    game.update_buttons(collect_button, trade_button, "gold", "wood", "stone", 4, 3)
+    renderer = game.Renderer(game.screen, game.ASSETS.get("bg"), game.ASSETS.get("stall_large"),
+                             game.STALL_CHARACTER_POSITIONS)
+    return renderer, (collect_button, trade_button)
+
+def idle_frame(renderer, buttons):
+    position = game.STALL_CHARACTER_POSITIONS[0]
+    sprite = game.ASSETS.sprite(position[2], STILL)
+    renderer.draw_frame(RESOURCES, 1, sprite, position[1], buttons)
+    return lambda: renderer.draw_frame(RESOURCES, 1, sprite, position[1], buttons)
+
+def full_frame(renderer, buttons):
+    draw = idle_frame(renderer, buttons)
+
+    def frame():
+        renderer.invalidate()
+        draw()
+    return frame
+
+# Every frame of one walk at WALK_FPS, drawn the way main() draws it
+def walk(renderer, buttons, stall_index):
+    path = Walk(waypoints(game.STALL_CHARACTER_POSITIONS, stall_index))
+    times = [frame / WALK_FPS for frame in range(int(path.duration * WALK_FPS) + 1)]
+    renderer.invalidate()
+    idle_frame(renderer, buttons)()
+
+    def play():
+        for t in times:
+            direction, pose, pos = path.frame(t)
+            renderer.draw_frame(RESOURCES, stall_index, game.ASSETS.sprite(direction, pose), pos, buttons)
+    return play, len(times)
+
+# The fastest of REPEATS samples is the least disturbed by everything else on the machine
+def measure(fn, calls, frames_per_call=1):
+    for _ in range(min(calls, 10)):
+        fn()
+    samples = []
+    gc.disable()
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        samples.append((time.perf_counter() - start) / calls)
+    gc.enable()
+    seconds = min(samples)
+
+    # Allocations are counted in a separate pass, since tracing slows everything down. A fixed
+    # number of calls, after one traced warm-up call, keeps the counts comparable between runs.
+    tracemalloc.start()
+    fn()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for _ in range(ALLOCATION_CALLS):
+        fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+
+    return {
+        "us_per_call": seconds * 1e6,
+        "per_second": frames_per_call / seconds,
+        "net_blocks_per_call": blocks / ALLOCATION_CALLS,
+        "peak_kib": (peak - baseline) / 1024,
+    }
+
+def run_all(calls):
+    renderer, buttons = scene()
+    collect_button, trade_button = buttons
+    results = {}
+    results["idle_frame"] = measure(idle_frame(renderer, buttons), calls)
+    results["full_frame"] = measure(full_frame(renderer, buttons), max(1, calls // 10))
+    for stall_index in sorted(WALK_PATHS):
+        play, frames = walk(renderer, buttons, stall_index)
+        result = measure(play, max(5, calls // 100), frames)
+        result["frames"] = frames
+        results[f"walk_{stall_index}"] = result
+    results["button_draw_largest_trade"] = measure(lambda: trade_button.draw(game.screen), calls)
+
+    def relayout():
+        trade_button.display_content = trade_button.display_content
+        trade_button.draw(game.screen)
+    results["button_layout_largest_trade"] = measure(relayout, calls)
+    results["draw_resource_box"] = measure(lambda: game.draw_resource_box(game.screen, 100, 15, "wood", 7), calls)
+    return results
+
+def run_processes(calls, runs):
+    best = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for run in range(runs):
+            path = os.path.join(directory, f"run{run}.json")
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--calls", str(calls), "--runs", "1",
+                            "--output", path], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            with open(path) as f:
+                for name, result in json.load(f)["results"].items():
+                    if name not in best or result["us_per_call"] < best[name]["us_per_call"]:
+                        best[name] = result
+    return best
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "sdl": ".".join(map(str, pygame.get_sdl_version())),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "video_driver": os.environ.get("SDL_VIDEODRIVER"),
+    }
+
+def print_results(results):
+    print(f"{'case':<30}{'us/call':>12}{'per second':>14}{'blocks/call':>13}{'peak KiB':>10}")
+    for name, result in results.items():
+        print(f"{name:<30}{result['us_per_call']:>12.1f}{result['per_second']:>14,.0f}"
+              f"{result['net_blocks_per_call']:>13.2f}{result['peak_kib']:>10.1f}")
+
+# Per-case change in time and allocations; returns the cases that got worse. Timings are only
+# comparable between runs on the same, otherwise idle, machine.
+def compare(old, new, threshold=THRESHOLD):
+    regressions = []
+    print(f"{'case':<30}{'old us':>10}{'new us':>10}{'change':>10}{'blocks':>14}")
+    names = list(old["results"]) + [name for name in new["results"] if name not in old["results"]]
+    for name in names:
+        before, after = old["results"].get(name), new["results"].get(name)
+        if before is None or after is None:
+            print(f"{name:<30}{'only in ' + ('new' if before is None else 'old'):>29}")
+            continue
+        change = 100 * (after["us_per_call"] / before["us_per_call"] - 1)
+        blocks = f"{before['net_blocks_per_call']:.1f}->{after['net_blocks_per_call']:.1f}"
+        slower = change > threshold
+        more_blocks = after["net_blocks_per_call"] > before["net_blocks_per_call"] + 0.5
+        flag = "  REGRESSION" if slower or more_blocks else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<30}{before['us_per_call']:>10.1f}{after['us_per_call']:>10.1f}{change:>+9.1f}%{blocks:>14}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the renderer headlessly")
+    parser.add_argument("-o", "--output", default=RESULTS_FILE, help="where to save the results")
+    parser.add_argument("--calls", type=int, default=1000, help="calls per timing sample")
+    parser.add_argument("--runs", type=int, default=RUNS, help="processes to take the best result from")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two saved runs instead")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="percent slowdown counted as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            old = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        regressions = compare(old, new, args.threshold)
+        print(f"{len(regressions)} regression(s)" if regressions else "no regressions")
+        return 1 if regressions else 0
+
+    results = run_all(args.calls) if args.runs == 1 else run_processes(args.calls, args.runs)
+    print_results(results)
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "calls": args.calls, "runs": args.runs, "results": results}, f, indent=1)
+    print(f"Results written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
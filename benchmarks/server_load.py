@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from client import COMMAND_NAMES, parse_address
+from core import legal_actions
+from server import parse_state
+
+# Plays games back to back on one connection with random legal moves, timing every round trip
+async def player(host, port, games, seed, latencies, start_gate):
+    rng = random.Random(seed)
+    await start_gate.wait()
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def request(command):
+        sent = time.perf_counter()
+        writer.write(command.encode("ascii") + b"\n")
+        line = await reader.readline()
+        latencies.append(time.perf_counter() - sent)
+        return parse_state(line.decode("ascii"))[1]
+
+    for _ in range(games):
+        state = await request("NEW")
+        while not state.over:
+            state = await request(COMMAND_NAMES[rng.choice(legal_actions(state))])
+    writer.write(b"QUIT\n")
+    writer.close()
+
+async def load_test(host, port, clients, games):
+    latencies = []
+    start_gate = asyncio.Event()
+    players = [asyncio.create_task(player(host, port, games, seed, latencies, start_gate)) for seed in range(clients)]
+    start = time.perf_counter()
+    start_gate.set()
+    await asyncio.gather(*players)
+    return time.perf_counter() - start, latencies
+
+def start_server():
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "server.py"), "--port", "0"],
+                               stdout=subprocess.PIPE, text=True)
+    address = process.stdout.readline().split()[-1]
+    return process, address
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the game server")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="existing server (default: start one)")
+    parser.add_argument("-c", "--clients", type=int, default=1000, help="concurrent connections")
+    parser.add_argument("-g", "--games", type=int, default=5, help="games per connection")
+    args = parser.parse_args()
+
+    process = None
+    address = args.connect
+    if address is None:
+        process, address = start_server()
+    try:
+        elapsed, latencies = asyncio.run(load_test(*parse_address(address), args.clients, args.games))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    latencies.sort()
+    games = args.clients * args.games
+    print(f"{args.clients} connections x {args.games} games against {address}")
+    print(f"{len(latencies):,} requests in {elapsed:.2f}s: {len(latencies) / elapsed:,.0f} requests/s, "
+          f"{games / elapsed:,.0f} games/s")
+    print(f"latency p50 {percentile(latencies, 0.50) * 1e3:.2f} ms, p99 {percentile(latencies, 0.99) * 1e3:.2f} ms, "
+          f"max {latencies[-1] * 1e3:.2f} ms")
+
+if __name__ == "__main__":
+    main()
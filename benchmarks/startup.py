@@ -0,0 +1,56 @@
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+
+from assets import Assets, ICON_SIZE, RESOURCE_IMAGES, setup_sprite
+from atlas import ATLAS_CACHE, build_atlas
+
+SCREEN_SIZE = (526, 595)
+REPEATS = 30
+
+# What the game did before the asset manager: one decode per image, no conversion
+def legacy_loader():
+    images = [pygame.transform.scale(pygame.image.load(path), ICON_SIZE) for path in RESOURCE_IMAGES.values()]
+    for row in setup_sprite():
+        for path in row:
+            if path:
+                images.append(pygame.transform.scale(pygame.image.load(path), ICON_SIZE))
+    images.append(pygame.transform.scale(pygame.image.load("images/bg.jpg"), SCREEN_SIZE))
+    return images
+
+def time_it(fn, repeats=REPEATS):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples)
+
+def main():
+    pygame.init()
+    pygame.display.set_mode(SCREEN_SIZE)
+
+    build_atlas()
+    results = [
+        ("legacy per-file decode", time_it(legacy_loader)),
+        ("Assets, per-file", time_it(lambda: Assets(SCREEN_SIZE, use_atlas=False))),
+        ("Assets, mapped atlas", time_it(lambda: Assets(SCREEN_SIZE))),
+        ("atlas rebuild", time_it(build_atlas, repeats=5)),
+    ]
+
+    print(f"{'loader':<26}{'median ms':>12}{'best ms':>12}")
+    for name, (median, best) in results:
+        print(f"{name:<26}{median:>12.2f}{best:>12.2f}")
+    print(f"atlas cache: {ATLAS_CACHE} ({os.path.getsize(ATLAS_CACHE)} bytes)")
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
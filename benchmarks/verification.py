@@ -0,0 +1,50 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core import Game
+from verify import pack_actions, verify_batch, verify_many
+
+# Random games with every TAMPER_EVERY-th claim inflated by one point
+TAMPER_EVERY = 10
+
+def make_submissions(n, seed=0):
+    rng = random.Random(seed)
+    submissions = []
+    for i in range(n):
+        game = Game(rng.getrandbits(64))
+        actions = []
+        while not game.over:
+            actions.append(rng.choice(game.legal_actions()))
+            game.step(actions[-1])
+        submissions.append((game.seed, pack_actions(actions), game.score() + (i % TAMPER_EVERY == 0)))
+    return submissions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark score verification")
+    parser.add_argument("-n", "--games", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    submissions = make_submissions(args.games)
+    expected = [i % TAMPER_EVERY == 0 for i in range(args.games)]
+
+    failed = False
+    for name, verifier in (("1 process", verify_batch),
+                           (f"{args.workers} workers", lambda subs: verify_many(subs, args.workers))):
+        start = time.perf_counter()
+        reasons = verifier(submissions)
+        elapsed = time.perf_counter() - start
+        correct = [reason is not None for reason in reasons] == expected
+        failed |= not correct
+        print(f"{name:<12}{args.games / elapsed:>12,.0f} games/s  "
+              f"{sum(reason is not None for reason in reasons):,} rejected{'' if correct else '  WRONG'}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+# Records the presented frames to disk from a background thread.
+#
+# The renderer already knows which rects changed each frame, so only those pixels are copied on
+# the game thread. They are appended to a bounded queue that the writer drains a few times a
+# second, so handing a frame over never wakes another thread in the middle of the game's frame.
+# When the queue is full the frame is dropped and counted instead of waiting, and the next frame
+# is sent whole so the recording stays consistent.
+#
+# The writer either appends the rects to a delta log (turned into PNGs later by running this
+# file) or keeps a full copy of the screen and saves every frame as a PNG. PNGs are compressed
+# with zlib, which lets go of the GIL while it works.
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+
+import pygame
+
+CAPTURE_QUEUE = 120
+DRAIN_SECONDS = 0.05
+FORMATS = ("deltas", "png")
+DELTA_FILE = "frames.bin"
+INDEX_FILE = "frames.json"
+# Per frame: timestamp, rect count; per rect: x, y, w, h, then w * h RGB bytes
+FRAME_HEADER = struct.Struct("<dI")
+RECT_HEADER = struct.Struct("<4H")
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_COMPRESSION = 1
+
+# A full RGB frame kept as PNG scanlines: each row starts with filter type 0, so the whole
+# buffer can go straight to zlib
+class Canvas:
+    def __init__(self, size):
+        self.width, self.height = size
+        self.stride = self.width * 3 + 1
+        self.rows = bytearray(self.stride * self.height)
+
+    def paste(self, x, y, w, h, rgb):
+        span = w * 3
+        start = y * self.stride + 1 + x * 3
+        for row in range(h):
+            offset = start + row * self.stride
+            self.rows[offset:offset + span] = rgb[row * span:(row + 1) * span]
+
+    def to_png(self):
+        def chunk(kind, data):
+            return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+        header = struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)
+        return (PNG_SIGNATURE + chunk(b"IHDR", header)
+                + chunk(b"IDAT", zlib.compress(self.rows, PNG_COMPRESSION)) + chunk(b"IEND", b""))
+
+class Recorder:
+    def __init__(self, directory, size, format="deltas", queue_size=CAPTURE_QUEUE):
+        if format not in FORMATS:
+            raise ValueError(f"format must be one of {FORMATS}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.size = size
+        self.format = format
+        self.queue_size = queue_size
+        self.pending = deque()
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.bytes_written = 0
+        self.timestamps = []
+        self.resync = True
+        self.closing = threading.Event()
+        self.start = time.perf_counter()
+        self.writer = threading.Thread(target=self.write_loop, name="capture-writer", daemon=True)
+        self.writer.start()
+
+    # Called after each presented frame with the rects that were pushed; never blocks
+    def capture(self, surface, rects):
+        if not rects:
+            return
+        if len(self.pending) >= self.queue_size:
+            self.dropped += 1
+            self.resync = True
+            return
+        # A window resized after recording started is cropped to the size it had then
+        bounds = surface.get_rect().clip((0, 0), self.size)
+        if self.resync:
+            rects = [bounds]
+            self.resync = False
+        patches = [(rect, surface.subsurface(rect).copy()) for rect in (r.clip(bounds) for r in rects) if rect]
+        self.pending.append((time.perf_counter() - self.start, patches))
+        self.captured += 1
+
+    # Waits for everything queued to be written, then saves the index
+    def close(self):
+        self.closing.set()
+        self.writer.join()
+        with open(os.path.join(self.directory, INDEX_FILE), "w") as f:
+            json.dump({"size": list(self.size), "format": self.format, "frames": self.written,
+                       "dropped": self.dropped, "timestamps": self.timestamps}, f)
+
+    def write_loop(self):
+        canvas = Canvas(self.size) if self.format == "png" else None
+        log = open(os.path.join(self.directory, DELTA_FILE), "wb") if self.format == "deltas" else None
+        while True:
+            closing = self.closing.wait(DRAIN_SECONDS)
+            while self.pending:
+                timestamp, patches = self.pending.popleft()
+                if log is not None:
+                    chunks = [FRAME_HEADER.pack(timestamp, len(patches))]
+                    for rect, patch in patches:
+                        chunks.append(RECT_HEADER.pack(*rect))
+                        chunks.append(pygame.image.tobytes(patch, "RGB"))
+                    data = b"".join(chunks)
+                    log.write(data)
+                else:
+                    for rect, patch in patches:
+                        canvas.paste(*rect, pygame.image.tobytes(patch, "RGB"))
+                    data = canvas.to_png()
+                    with open(os.path.join(self.directory, f"frame_{self.written:06d}.png"), "wb") as f:
+                        f.write(data)
+                self.bytes_written += len(data)
+                self.timestamps.append(round(timestamp, 6))
+                self.written += 1
+            if closing:
+                break
+        if log is not None:
+            log.close()
+
+# Replays a delta log into full frames, yielding (timestamp, surface); the surface is reused
+def read_deltas(directory):
+    with open(os.path.join(directory, INDEX_FILE)) as f:
+        index = json.load(f)
+    canvas = pygame.Surface(index["size"])
+    with open(os.path.join(directory, DELTA_FILE), "rb") as log:
+        for _ in range(index["frames"]):
+            timestamp, count = FRAME_HEADER.unpack(log.read(FRAME_HEADER.size))
+            for _ in range(count):
+                x, y, w, h = RECT_HEADER.unpack(log.read(RECT_HEADER.size))
+                canvas.blit(pygame.image.frombytes(log.read(w * h * 3), (w, h), "RGB"), (x, y))
+            yield timestamp, canvas
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Turn a recorded delta log into a PNG sequence")
+    parser.add_argument("directory", help="capture directory written by game.py --capture")
+    parser.add_argument("--output", help="where to put the PNGs (default: the capture directory)")
+    args = parser.parse_args()
+
+    output = args.output or args.directory
+    os.makedirs(output, exist_ok=True)
+    count = 0
+    for count, (timestamp, frame) in enumerate(read_deltas(args.directory), 1):
+        pygame.image.save(frame, os.path.join(output, f"frame_{count - 1:06d}.png"))
+    print(f"Wrote {count} frames to {output}")
@@ -0,0 +1,52 @@
+# Plays a game hosted by server.py; it looks like core.Game to the caller, but every state comes from the server
+import socket
+
+from core import COLLECT, TRADE, legal_actions, score
+from server import DEFAULT_HOST, DEFAULT_PORT, parse_state
+
+COMMAND_NAMES = {COLLECT: "COLLECT", TRADE: "TRADE"}
+
+# "host:port", ":port" or "port"; raises ValueError for anything else
+def parse_address(address):
+    host, _, port = address.rpartition(":")
+    if not port:
+        return host or DEFAULT_HOST, DEFAULT_PORT
+    if not port.isdigit() or not 0 < int(port) < 1 << 16:
+        raise ValueError(f"expected HOST:PORT with a port from 1 to 65535, not {address!r}")
+    return host or DEFAULT_HOST, int(port)
+
+class RemoteGame:
+    def __init__(self, address, seed=None, timeout=5.0):
+        self.sock = socket.create_connection(parse_address(address), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.lines = self.sock.makefile("r", encoding="ascii", newline="\n")
+        self.seed, self.state = self.request("NEW" if seed is None else f"NEW {seed}")
+
+    def request(self, command):
+        self.sock.sendall(f"{command}\n".encode("ascii"))
+        line = self.lines.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        return parse_state(line)
+
+    @property
+    def over(self):
+        return self.state.over
+
+    def legal_actions(self):
+        return legal_actions(self.state)
+
+    def step(self, action):
+        self.seed, self.state = self.request(COMMAND_NAMES[action])
+        return self.state
+
+    def score(self):
+        return score(self.state.resources)
+
+    def close(self):
+        try:
+            self.sock.sendall(b"QUIT\n")
+        except OSError:
+            pass
+        self.lines.close()
+        self.sock.close()
@@ -0,0 +1,174 @@
+# Game rules with no pygame dependency, so they can be simulated headlessly
+import functools
+import random
+
+RESOURCES = ("bread", "wood", "stone", "gold", "sheep")
+START_RESOURCES = (2, 2, 0, 0, 0)
+CAP = 10
+ROUNDS = 10
+
+COLLECT = 0
+TRADE = 1
+ACTIONS = ("collect", "trade")
+
+# Offers are (resource_to_collect, trade_from, trade_to, trade_amount, trade_to_amount),
+# with resources given as indices into RESOURCES
+
+def can_collect(resources, offer):
+    return resources[offer[0]] < CAP
+
+def can_trade(resources, offer):
+    return resources[offer[1]] >= offer[3] and resources[offer[2]] + offer[4] <= CAP
+
+# The generator from the original main(): draw everything, redraw while both options are impossible.
+# Kept as the reference for draw_offer, which samples the same distribution without retries.
+def draw_offer_rejection(resources, rng):
+    while True:
+        resource_to_collect = rng.choice(range(len(resources)))
+        trade_from = rng.choice([res for res in range(len(resources)) if resources[res] > 0])
+        trade_to = rng.choice([res for res in range(len(resources)) if res != trade_from])
+        trade_amount = rng.randint(1, min(3, resources[trade_from]))
+        trade_to_amount = rng.randint(2, 4)
+        offer = (resource_to_collect, trade_from, trade_to, trade_amount, trade_to_amount)
+        if can_collect(resources, offer) or can_trade(resources, offer):
+            return offer
+
+OFFER_TABLE_CACHE = 65536
+
+# Per-state offer table for draw_offer, which samples the same distribution as
+# draw_offer_rejection in one draw with no retries.
+#
+# The collect resource is drawn independently of the trade, and an offer is only rejected
+# when that resource is full *and* the trade overflows the cap, so the valid offers split into
+#   (collect not full) x (any trade)  +  (collect full) x (trade that fits)
+# Summing out trade_amount, every (trade_from, trade_to, trade_to_amount) triple has the same
+# weight, so the cumulative weights are just counts: both parts are uniform over sets of
+# triples that can be indexed directly.
+@functools.lru_cache(maxsize=OFFER_TABLE_CACHE)
+def offer_table(resources):
+    n = len(resources)
+    open_resources = tuple(res for res in range(n) if resources[res] < CAP)
+    full_resources = tuple(res for res in range(n) if resources[res] >= CAP)
+    non_empty = tuple(res for res in range(n) if resources[res] > 0)
+    fitting = tuple((trade_from, trade_to, trade_to_amount)
+                    for trade_from in non_empty for trade_to in range(n) if trade_to != trade_from
+                    for trade_to_amount in range(2, 5) if resources[trade_to] + trade_to_amount <= CAP)
+    any_trades = len(non_empty) * (n - 1) * 3
+    collect_any = len(open_resources) * any_trades
+    return open_resources, full_resources, non_empty, fitting, any_trades, collect_any, collect_any + len(full_resources) * len(fitting)
+
+# trade_amount is uniform over 1..min(3, held) and 6 is a multiple of every such range size,
+# so it comes out of the same draw
+def draw_offer(resources, rng):
+    open_resources, full_resources, non_empty, fitting, any_trades, collect_any, total = offer_table(tuple(resources))
+
+    x, amount_slot = divmod(rng.randrange(total * 6), 6)
+    if x < collect_any:
+        collect, x = divmod(x, any_trades)
+        source, x = divmod(x, any_trades // len(non_empty))
+        slot, extra = divmod(x, 3)
+        trade_from = non_empty[source]
+        trade_to = slot + (slot >= trade_from)
+        trade_to_amount = 2 + extra
+        resource_to_collect = open_resources[collect]
+    else:
+        collect, x = divmod(x - collect_any, len(fitting))
+        trade_from, trade_to, trade_to_amount = fitting[x]
+        resource_to_collect = full_resources[collect]
+
+    trade_amount = 1 + amount_slot * min(3, resources[trade_from]) // 6
+    return (resource_to_collect, trade_from, trade_to, trade_amount, trade_to_amount)
+
+def collect_resource(resources, resource):
+    resources = list(resources)
+    resources[resource] += 1
+    return tuple(resources)
+
+def trade_resources(resources, trade_from, trade_to, trade_amount, trade_to_amount):
+    resources = list(resources)
+    resources[trade_from] -= trade_amount
+    resources[trade_to] += trade_to_amount
+    return tuple(resources)
+
+def score(resources):
+    return sum(value ** 2 for value in resources)
+
+class GameState:
+    __slots__ = ("resources", "round", "offer")
+
+    def __init__(self, resources, round, offer):
+        self.resources = resources
+        self.round = round
+        self.offer = offer
+
+    def __repr__(self):
+        return f"GameState(resources={self.resources}, round={self.round}, offer={self.offer})"
+
+    @property
+    def over(self):
+        return self.round > ROUNDS
+
+def new_game(rng):
+    return GameState(START_RESOURCES, 1, draw_offer(START_RESOURCES, rng))
+
+def legal_actions(state):
+    if state.over:
+        return ()
+    actions = []
+    if can_collect(state.resources, state.offer):
+        actions.append(COLLECT)
+    if can_trade(state.resources, state.offer):
+        actions.append(TRADE)
+    return tuple(actions)
+
+def apply_action(resources, offer, action):
+    if action == COLLECT:
+        return collect_resource(resources, offer[0])
+    return trade_resources(resources, *offer[1:])
+
+def step(state, action, rng):
+    if action not in legal_actions(state):
+        raise ValueError(f"{ACTIONS[action] if action in (COLLECT, TRADE) else action!r} is not legal in {state}")
+    resources = apply_action(state.resources, state.offer, action)
+    round_num = state.round + 1
+    offer = draw_offer(resources, rng) if round_num <= ROUNDS else None
+    return GameState(resources, round_num, offer)
+
+# Convenience wrapper owning a seeded RNG and the current state. Without a seed one is
+# picked, so every game can be recorded and replayed.
+class Game:
+    def __init__(self, seed=None):
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.rng = random.Random(self.seed)
+        self.state = new_game(self.rng)
+
+    @property
+    def over(self):
+        return self.state.over
+
+    def legal_actions(self):
+        return legal_actions(self.state)
+
+    def step(self, action):
+        self.state = step(self.state, action, self.rng)
+        return self.state
+
+    def score(self):
+        return score(self.state.resources)
+
+def play(policy, seed=None):
+    game = Game(seed)
+    while not game.over:
+        game.step(policy(game.state, game.legal_actions()))
+    return game.score()
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = random.Random(0)
+    start = time.perf_counter()
+    total = sum(play(lambda state, actions: rng.choice(actions), seed) for seed in range(games))
+    elapsed = time.perf_counter() - start
+    print(f"{games} random games in {elapsed:.2f}s ({games / elapsed:,.0f} games/s), mean score {total / games:.2f}")
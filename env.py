@@ -0,0 +1,133 @@
+# Vectorized environment for training agents: a whole batch of games advances in one step() call.
+#
+# The games are a batch.BatchGames, so the offer generator, trades and the cap are the same rules
+# as everywhere else. Observations, rewards and flags are written into buffers allocated once;
+# the arrays returned by reset() and step() are those buffers, overwritten by the next call.
+#
+# Stepping is not allocation-free, only light: BatchGames makes small NumPy temporaries each
+# round. Its random draws come from Generator.bit_generator.random_raw(), which has no out=, and
+# the games that need their offer redrawn differ in number from round to round, so those arrays
+# can't be sized up front. The legality masks and index gathers in step() and observe() are
+# temporaries of the same kind, a few per game per step.
+import numpy as np
+
+from batch import N_RESOURCES, BatchGames
+from core import COLLECT, ROUNDS, TRADE
+
+# Observation columns: resources, round, then the offer as in core
+OBS_RESOURCES = slice(0, N_RESOURCES)
+OBS_ROUND = N_RESOURCES
+OBS_OFFER = slice(N_RESOURCES + 1, N_RESOURCES + 6)
+OBS_SIZE = N_RESOURCES + 6
+
+# "delta" pays the change in sum of squares every round (adding up to the final score minus the
+# starting 8); "terminal" pays the whole score on the last round only
+REWARD_MODES = ("delta", "terminal")
+
+class BatchEnv:
+    def __init__(self, n, reward="delta", autoreset=False):
+        if reward not in REWARD_MODES:
+            raise ValueError(f"reward must be one of {REWARD_MODES}")
+        self.n = n
+        self.reward_mode = reward
+        self.autoreset = autoreset
+        self.games = None
+        self.seed = None
+
+        self.observations = np.zeros((n, OBS_SIZE), dtype=np.int8)
+        self.final_observations = np.zeros((n, OBS_SIZE), dtype=np.int8)
+        self.rewards = np.zeros(n, dtype=np.float32)
+        self.terminated = np.zeros(n, dtype=bool)
+        self.all_terminated = np.ones(n, dtype=bool)
+        # action_mask[:, COLLECT] and action_mask[:, TRADE] say which options the current offer allows
+        self.action_mask = np.zeros((n, 2), dtype=bool)
+        self.scores = np.zeros(n, dtype=np.int16)
+        self.final_scores = np.zeros(n, dtype=np.int16)
+        self.previous_scores = np.zeros(n, dtype=np.int16)
+        self._wide = np.zeros((n, N_RESOURCES), dtype=np.int16)
+
+    def reset(self, seed=None):
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        # One child per episode, so autoresets keep drawing fresh, reproducible games
+        self.seed = seed
+        if self.games is None:
+            self.games = BatchGames(self.n, seed.spawn(1)[0])
+        else:
+            self.games.reset(seed.spawn(1)[0])
+        self.terminated[:] = False
+        self.update_scores()
+        self.previous_scores[:] = self.scores
+        self.observe(self.observations)
+        return self.observations
+
+    # Takes one action per game. An option the offer doesn't allow falls back to the other one,
+    # as in BatchGames.step; action_mask tells the agent which ones are allowed.
+    # Returns (observations, rewards, terminated, info); every game ends after the same number of rounds.
+    def step(self, actions):
+        if self.games is None:
+            raise RuntimeError("call reset() before step()")
+        if self.terminated.all():
+            raise RuntimeError("the episode is over; call reset()")
+        games = self.games
+        games.step(actions)
+        self.update_scores()
+
+        if self.reward_mode == "delta":
+            np.subtract(self.scores, self.previous_scores, out=self.rewards, casting="unsafe")
+            self.previous_scores[:] = self.scores
+        over = games.round > ROUNDS
+        self.terminated[:] = over
+        if self.reward_mode == "terminal":
+            np.multiply(self.scores, over, out=self.rewards, casting="unsafe")
+
+        self.observe(self.observations)
+        info = {"action_mask": self.action_mask, "scores": self.scores}
+        if self.autoreset and over.all():
+            self.final_observations[:] = self.observations
+            info["final_observations"] = self.final_observations
+            info["final_scores"] = self.final_scores
+            self.final_scores[:] = self.scores
+            self.reset(self.seed)
+            return self.observations, self.rewards, self.all_terminated, info
+        return self.observations, self.rewards, self.terminated, info
+
+    def update_scores(self):
+        np.copyto(self._wide, self.games.resources)
+        np.einsum("ij,ij->i", self._wide, self._wide, out=self.scores)
+
+    def observe(self, out):
+        games = self.games
+        out[:, OBS_RESOURCES] = games.resources
+        out[:, OBS_ROUND] = games.round
+        out[:, OBS_OFFER] = games.offers
+        playing = games.round <= ROUNDS
+        self.action_mask[:, COLLECT] = games.legal_collect() & playing
+        self.action_mask[:, TRADE] = games.legal_trade() & playing
+        # Finished games keep their last offer in BatchGames; it means nothing any more
+        if not playing.all():
+            out[~playing, OBS_OFFER] = 0
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Step random agents through the batched environment")
+    parser.add_argument("-n", "--envs", type=int, default=4096)
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    env = BatchEnv(args.envs, autoreset=True)
+    env.reset(args.seed)
+    actions = np.random.default_rng(args.seed).integers(0, 2, size=(ROUNDS, args.envs), dtype=np.int8)
+    returns = np.zeros(args.envs, dtype=np.float64)
+
+    start = time.perf_counter()
+    for step in range(args.episodes * ROUNDS):
+        _, rewards, _, _ = env.step(actions[step % ROUNDS])
+        returns += rewards
+    elapsed = time.perf_counter() - start
+    steps = args.episodes * ROUNDS * args.envs
+    print(f"{steps:,} env steps in {elapsed:.2f}s ({steps / elapsed:,.0f} steps/s), "
+          f"mean return {returns.sum() / (args.episodes * args.envs):.2f}")
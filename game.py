@@ -1,22 +1,23 @@
+import argparse
+import functools
+import sys
 import pygame
-import random
 
-FRONT = 0
-BACK = 1
-LEFT = 2
-RIGHT = 4
-
-WALKING_1 = 0
-STILL = 1
-WALKING_2 = 2
-
-# Initialize Pygame
-pygame.init()
-
-# Screen dimensions and setup
+from animation import Animator, waypoints
+from client import RemoteGame, parse_address
+from assets import Assets, BACK, LEFT, RIGHT, STILL, scaled_size
+from capture import FORMATS, Recorder
+from core import RESOURCES, COLLECT, TRADE, Game, score
+from leaderboard import LEADERBOARD_DB, Leaderboard
+from profiler import Profiler
+from replay import ReplayError, SessionLog, read_log, session_path, write_log
+
+# The layout's own size. Everything below is positioned in these logical pixels and VIEW maps
+# them into the window, which opens at this size but can be resized or made fullscreen.
 SCREEN_WIDTH, SCREEN_HEIGHT = 526, 595
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Resource Game")
+screen = None
+ASSETS = None
+VIEW = None
 
 # Colors
 WHITE = (255, 255, 255)
@@ -24,10 +25,121 @@ BLACK = (0, 0, 0)
 EARTHY_GREEN = (102, 153, 102)
 EARTHY_BROWN = (139, 69, 19)
 LIGHT_GREY = (211, 211, 211)
-
-# Fonts
-FONT = pygame.font.Font("8bit.ttf", 36)
-BIG_FONT = pygame.font.Font('8bit.ttf', 60)
+HINT_GOLD = (255, 215, 0)
+HINT_BORDER = 4
+
+# Frame pacing: capped while the sprite walks, event-driven otherwise
+TARGET_FPS = 60
+IDLE_TIMEOUT_MS = 1000
+
+# Every session is logged here; a replay takes one action per pause, scaled by --speed
+SESSIONS_DIR = "sessions"
+REPLAY_PAUSE_MS = 600
+
+# Frame profiler; F3 shows its overlay, refreshed a few times a second
+PROFILER = Profiler()
+PROFILER_HUD_POS = (5, 80)
+PROFILER_HUD_REFRESH_MS = 250
+PROFILER_HUD_SECTIONS = 6
+HUD_FONT = None
+_hud = None
+
+# HUD resource boxes, left to right
+RESOURCE_BOXES = [(15, "stall"), (100, "wood"), (185, "bread"), (270, "stone"), (355, "gold"), (440, "sheep")]
+
+# Where each stall is drawn, where the character stands at it and which way they face
+STALL_CHARACTER_POSITIONS = [
+    ((45, 85),(70,145),BACK), 
+    ((-20, 250),(35,280),LEFT),
+    ((80, 360),(75,385),RIGHT), 
+    ((130, 260),(155,320),BACK),
+    ((278, 255),(305,310),BACK), 
+    ((405,120),(430,180),BACK),
+    ((365, 382),(425,410),LEFT),
+    ((278, 255),(305,310),BACK), 
+    ((-20, 250),(35,280),LEFT),
+    ((45, 85),(70,145),BACK)
+]
+
+# Fonts, loaded at their scaled point size whenever the window changes size
+FONT_FILE = "8bit.ttf"
+FONT_SIZE = 36
+BIG_FONT_SIZE = 60
+FONT = None
+BIG_FONT = None
+
+# Rendered text is cached; the HUD only ever shows 0-10 and a handful of labels
+TEXT_CACHE_SIZE = 128
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(font, text, color):
+    return font.render(text, True, color)
+
+# Fits the logical layout into the window as large as it goes without stretching it; the
+# bars left over on two sides stay black
+class Viewport:
+    def __init__(self, window_size):
+        self.window_size = tuple(window_size)
+        self.scale = min(window_size[0] / SCREEN_WIDTH, window_size[1] / SCREEN_HEIGHT)
+        size = scaled_size((SCREEN_WIDTH, SCREEN_HEIGHT), self.scale)
+        self.area = pygame.Rect(((window_size[0] - size[0]) // 2, (window_size[1] - size[1]) // 2), size)
+
+    def point(self, pos):
+        return self.area.x + round(pos[0] * self.scale), self.area.y + round(pos[1] * self.scale)
+
+    def length(self, length):
+        return max(1, round(length * self.scale))
+
+    def rect(self, rect):
+        x, y, width, height = rect
+        return pygame.Rect(self.point((x, y)), scaled_size((width, height), self.scale))
+
+    # Window pixels (a mouse position) back to the layout's
+    def to_logical(self, pos):
+        return (pos[0] - self.area.x) / self.scale, (pos[1] - self.area.y) / self.scale
+
+# Opens the window and loads fonts and images; importing this module does none of that.
+# size defaults to the layout's own; fullscreen uses the display's native resolution.
+def init_display(size=None, fullscreen=False):
+    global screen, ASSETS
+    if screen is not None:
+        return screen
+
+    # Without this Windows scales the whole window up itself on high-DPI displays, blurring it
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            ctypes.windll.shcore.SetProcessDpiAwareness(1)
+        except (AttributeError, OSError):
+            pass
+
+    pygame.init()
+    if fullscreen:
+        screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    else:
+        screen = pygame.display.set_mode(size or (SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+    pygame.display.set_caption("Resource Game")
+
+    # Every image is decoded once here; the render loop only reads shared surfaces
+    ASSETS = Assets((SCREEN_WIDTH, SCREEN_HEIGHT))
+    resize_display()
+    return screen
+
+# Picks up the window's current size: new viewport, fonts and asset copies for that size.
+# Anything laid out for the old size (buttons, the renderer's base image) has to be redone.
+def resize_display():
+    global screen, VIEW, FONT, BIG_FONT, _hud
+    screen = pygame.display.get_surface()
+    VIEW = Viewport(screen.get_size())
+    ASSETS.set_scale(VIEW.scale)
+    _hud = None
+
+    render_text.cache_clear()
+    FONT = pygame.font.Font(FONT_FILE, VIEW.length(FONT_SIZE))
+    BIG_FONT = pygame.font.Font(FONT_FILE, VIEW.length(BIG_FONT_SIZE))
+    for amount in range(11):
+        render_text(FONT, str(amount), BLACK)
+    return screen
 
 # Button class with rounded corners and dynamic content
 class Button:
@@ -38,103 +150,121 @@ class Button:
         self.action = action
         self.radius = 20
         self.display_content = None
+        self.highlighted = False
+
+    # Changing the content throws away the cached layout. The content holds images scaled for
+    # the window, so after a resize it has to be set again.
+    @property
+    def display_content(self):
+        return self._display_content
+
+    @display_content.setter
+    def display_content(self, content):
+        self._display_content = content
+        self.content_version = getattr(self, "content_version", -1) + 1
+        self._layout = None
+
+    # The hint outline; toggling it only needs a redraw, not a new layout
+    @property
+    def highlighted(self):
+        return self._highlighted
+
+    @highlighted.setter
+    def highlighted(self, highlighted):
+        self._highlighted = highlighted
+        self.content_version = getattr(self, "content_version", -1) + 1
+
+    # Positions every item once so draw() is just a rect and a few blits
+    def layout(self):
+        items = []
+        for item in self.display_content or ():
+            if isinstance(item, str):
+                items.append(render_text(FONT, item, self.text_color))
+            elif isinstance(item, pygame.Surface):
+                items.append(item)
 
-    def draw(self, surface):
-        pygame.draw.rect(surface, self.color, self.rect, border_radius=self.radius)
-        
         # Calculate the total width of the content (text and images combined)
-        total_width = 0
-        if self.display_content:
-            for item in self.display_content:
-                if isinstance(item, str):
-                    text_obj = FONT.render(item, True, self.text_color)
-                    total_width += text_obj.get_width() + 5
-                elif isinstance(item, pygame.Surface):
-                    total_width += item.get_width() + 5
-
-            # Calculate starting X position to center the content
-            x_offset = self.rect.centerx - total_width // 2
-
-            # Draw the content centered
-            for item in self.display_content:
-                if isinstance(item, str):
-                    text_obj = FONT.render(item, True, self.text_color)
-                    surface.blit(text_obj, (x_offset, self.rect.centery - text_obj.get_height() // 2))
-                    x_offset += text_obj.get_width() + 5
-                elif isinstance(item, pygame.Surface):
-                    surface.blit(item, (x_offset, self.rect.centery - item.get_height() // 2))
-                    x_offset += item.get_width() + 5
-
-    def is_clicked(self, pos):
-        return self.rect.collidepoint(pos)
-
-def setup_sprite():
-    spriteImages = [[0 for x in range(3)] for y in range(5)]
+        gap = VIEW.length(5)
+        total_width = sum(item.get_width() + gap for item in items)
 
-    #front
-    spriteImages[FRONT][WALKING_1] = ('images/sprite/walking_front_1.png')
-    spriteImages[FRONT][STILL] = ('images/sprite/still_front.png')
-    spriteImages[FRONT][WALKING_2] = ('images/sprite/walking_front_2.png')
+        # Calculate starting X position to center the content
+        self._rect = VIEW.rect(self.rect)
+        x_offset = self._rect.centerx - total_width // 2
 
-    #back
-    spriteImages[BACK][WALKING_1] = ('images/sprite/walking_back_1.png')
-    spriteImages[BACK][STILL] = ('images/sprite/still_back.png')
-    spriteImages[BACK][WALKING_2] = ('images/sprite/walking_back_2.png')
+        self._layout = []
+        self._bounds = self._rect.copy()
+        for item in items:
+            pos = (x_offset, self._rect.centery - item.get_height() // 2)
+            self._layout.append((item, pos))
+            self._bounds.union_ip(item.get_rect(topleft=pos))
+            x_offset += item.get_width() + gap
 
-    #left
-    spriteImages[LEFT][WALKING_1] = ('images/sprite/walking_left_1.png')
-    spriteImages[LEFT][STILL] = ('images/sprite/still_left.png')
-    spriteImages[LEFT][WALKING_2] = ('images/sprite/walking_left_2.png')
-
-    #right
-    spriteImages[RIGHT][WALKING_1] = ('images/sprite/walking_right_1.png')
-    spriteImages[RIGHT][STILL] = ('images/sprite/still_right.png')
-    spriteImages[RIGHT][WALKING_2] = ('images/sprite/walking_right_2.png')
+    def draw(self, surface):
+        if self._layout is None:
+            self.layout()
+
+        radius = VIEW.length(self.radius)
+        pygame.draw.rect(surface, self.color, self._rect, border_radius=radius)
+        surface.blits(self._layout, doreturn=False)
+        bounds = self._bounds.copy()
+        if self.highlighted:
+            border = VIEW.length(HINT_BORDER)
+            outline = self._rect.inflate(2 * border, 2 * border)
+            pygame.draw.rect(surface, HINT_GOLD, outline, border, border_radius=radius + border)
+            bounds.union_ip(outline)
+
+        # Content can overhang the rounded rect, so report everything that was touched
+        return bounds
 
-    return spriteImages
+    def is_clicked(self, pos):
+        return self.rect.collidepoint(pos)
 
 # Helper functions
 def draw_text(surface, text, font, color, x, y):
-    text_obj = font.render(text, True, color)
+    text_obj = render_text(font, text, color)
     text_rect = text_obj.get_rect(center=(x, y))
     surface.blit(text_obj, text_rect)
 
-def trade_resources(resources, trade_from, trade_to, trade_amount, trade_to_amount):
-    resources[trade_from] -= trade_amount
-    resources[trade_to] += trade_to_amount
-    return resources
-
 def load_resource_image(resource):
-    resource_images = {
-        "wood": "images/wood.png",
-        "bread": "images/bread.png",
-        "stone": "images/stone.png",
-        "gold": "images/gold.png",
-        "sheep": "images/sheep.png"
-    }
-    image = pygame.image.load(resource_images[resource])
-    return pygame.transform.scale(image, (30, 30))
-    
-def put_sprite_at(spriteImages, direction,state, pos):
-     # Load and scale the resource image
-    image_path = spriteImages[direction][state]
-    image = pygame.image.load(image_path)
-    image = pygame.transform.scale(image, (30, 30))
-
-    # Blit the sprite
-    screen.blit(image,pos)
-
-
-def update_buttons(collect_button, trade_button, resource_to_collect, trade_to, trade_from, trade_to_amount, trade_amount):
+    return ASSETS.resource(resource)
+
+def update_buttons(collect_button, trade_button, resource_to_collect, trade_to, trade_from, trade_to_amount, trade_amount,
+                   hint=None):
+    collect_button.highlighted = hint == COLLECT
+    trade_button.highlighted = hint == TRADE
     collect_button.display_content = ["+", load_resource_image(resource_to_collect)]
     trade_button.display_content = (
         ["+"] + [load_resource_image(trade_to)] * trade_to_amount +
         ["-"] + [load_resource_image(trade_from)] * trade_amount
     )
 
-def display_game_over(resources):
+def show_offer(collect_button, trade_button, offer, hint=None):
+    resource_to_collect, trade_from, trade_to, trade_amount, trade_to_amount = offer
+    update_buttons(collect_button, trade_button, RESOURCES[resource_to_collect], RESOURCES[trade_to],
+                   RESOURCES[trade_from], trade_to_amount, trade_amount, hint)
+
+# The option with the higher expected final score according to solver.py's value table.
+# The table is memory-mapped, so this reads two floats and never loads the whole file.
+def hint_for(values, state):
+    if values is None or state.over:
+        return None
+    from solver import best_action
+
+    return best_action(values, state.round, state.resources, state.offer)
+
+# solver pulls in NumPy, so it's only imported once hints are turned on
+def load_hints():
+    from solver import POLICY_FILE, load_policy
+
+    try:
+        return load_policy()
+    except FileNotFoundError:
+        print(f"No {POLICY_FILE}; run python3 solver.py to enable hints")
+        return None
+
+def display_game_over(resources, rank=None):
     # Calculate final score as the sum of all resources
-    final_score = sum(value ** 2 for value in resources.values())
+    final_score = score(resources.values())
 
     # Draw an earthy-colored box in the center of the screen
     box_width, box_height = 400, 200
@@ -144,470 +274,446 @@ def display_game_over(resources):
         box_width,
         box_height
     )
-    pygame.draw.rect(screen, EARTHY_BROWN, box_rect, border_radius=20)
+    pygame.draw.rect(screen, EARTHY_BROWN, VIEW.rect(box_rect), border_radius=VIEW.length(20))
 
     # Display final score
-    draw_text(screen, "Game Over", BIG_FONT, WHITE, SCREEN_WIDTH // 2, box_rect.top + 60)
-    draw_text(screen, f"Final Score: {final_score}", FONT, WHITE, SCREEN_WIDTH // 2, box_rect.top + 120)
+    draw_text(screen, "Game Over", BIG_FONT, WHITE, *VIEW.point((SCREEN_WIDTH // 2, box_rect.top + 60)))
+    draw_text(screen, f"Final Score: {final_score}", FONT, WHITE, *VIEW.point((SCREEN_WIDTH // 2, box_rect.top + 120)))
+    if rank is not None:
+        place, total = rank
+        draw_text(screen, f"Rank {place} of {total}", FONT, WHITE, *VIEW.point((SCREEN_WIDTH // 2, box_rect.top + 160)))
     pygame.display.flip()
 
-def draw_resource_box(x, y, resource, amount):
-    # Define resource images
-    resource_images = {
-        "wood": "images/wood.png",
-        "bread": "images/bread.png",
-        "stone": "images/stone.png",
-        "gold": "images/gold.png",
-        "sheep": "images/sheep.png",
-        "stall": "images/stall.png"
-    }
-    
-    # Load and scale the resource image
-    image_path = resource_images[resource]
-    image = pygame.image.load(image_path)
-    image = pygame.transform.scale(image, (30, 30))
+def draw_resource_box(surface, x, y, resource, amount):
+    image = ASSETS.resource(resource)
 
     # Dimensions for the transparent box
     box_width = 70
     box_height = 50
 
     # Create the box with a thin black border
-    box_rect = pygame.Rect(x, y, box_width, box_height)
-    pygame.draw.rect(screen, LIGHT_GREY + (128,), box_rect, border_radius=10)  # Semi-transparent light grey
-    pygame.draw.rect(screen, BLACK, box_rect, 2, border_radius=10)  # Black border
+    box_rect = VIEW.rect((x, y, box_width, box_height))
+    radius = VIEW.length(10)
+    pygame.draw.rect(surface, LIGHT_GREY + (128,), box_rect, border_radius=radius)  # Semi-transparent light grey
+    pygame.draw.rect(surface, BLACK, box_rect, VIEW.length(2), border_radius=radius)  # Black border
 
     # Blit the resource image in the box
-    screen.blit(image, (x + 5, y + (box_height - image.get_height()) // 2))
+    surface.blit(image, (box_rect.x + VIEW.length(5), box_rect.y + (box_rect.height - image.get_height()) // 2))
 
     # Render the resource amount and center it
-    amount_text = FONT.render(str(amount), True, BLACK)
-    amount_text_rect = amount_text.get_rect(center=(x + box_width - 20, y + box_height // 2))
-    screen.blit(amount_text, amount_text_rect)
-
-
-def main():
-
-    def animate_sprite_at(spriteImages, direction,state, pos1):
-        # Load and scale the resource image
-        image_path = spriteImages[direction][state]
-        image = pygame.image.load(image_path)
-        image = pygame.transform.scale(image, (30, 30))
-
-        screen.fill(WHITE)
-        screen.blit(bg_image, (0, 0))
-        pygame.draw.rect(screen, LIGHT_GREY, (0, 0, SCREEN_WIDTH, 75))
-
-        # Render resource boxes
-        draw_resource_box(15, 15, "stall", min(round_num, 10))
-        draw_resource_box(100, 15, "wood", resources["wood"])
-        draw_resource_box(185, 15, "bread", resources["bread"])
-        draw_resource_box(270, 15, "stone", resources["stone"])
-        draw_resource_box(355, 15, "gold", resources["gold"])
-        draw_resource_box(440, 15, "sheep", resources["sheep"])
-
-
-        for pos in stall_character_positions:
-            screen.blit(stall_image, pos[0])
-
-        # Blit the sprite
-        screen.blit(image,pos1)
-
-        collect_button.draw(screen)
-        trade_button.draw(screen)
-
-        pygame.display.flip()
-        pygame.time.wait(100)
-
-    def move_sprite(spriteImages, stall_index):
-        if stall_index == 1:
-            animation1(spriteImages)
-        elif stall_index == 2:
-            animation2(spriteImages)
-        elif stall_index == 3:
-            animation3(spriteImages)
-        elif stall_index == 4:
-            animation4(spriteImages)
-        elif stall_index == 5:
-            animation5(spriteImages)
-        elif stall_index == 6:
-            animation6(spriteImages)
-        elif stall_index == 7:
-            animation7(spriteImages)
-        elif stall_index == 8:
-            animation8(spriteImages)
-        elif stall_index == 9:
-            animation9(spriteImages)
-
-    def animation1(spriteImages):
-        animate_sprite_at(spriteImages, RIGHT, STILL, (70,145))
-
-        count = 0
-        for step in range (75,95,5):
-            animate_sprite_at(spriteImages, RIGHT, count%3, (step,145))
-            count += 1
-
-        animate_sprite_at(spriteImages, RIGHT, STILL, (100,145))
-        animate_sprite_at(spriteImages, FRONT, STILL, (100,145))
-
-        count = 0
-        for step in range (150,280,5):
-            animate_sprite_at(spriteImages, FRONT, count%3, (100,step))
-            count += 1
-
-        animate_sprite_at(spriteImages, FRONT, STILL, (100,280))
-        animate_sprite_at(spriteImages, LEFT, STILL, (100,280))
-
-        count = 0
-        for step in range (5,65,5):
-            animate_sprite_at(spriteImages, LEFT, count%3, (100-step,280))
-            count +=1
-        
-        animate_sprite_at(spriteImages, LEFT, STILL, (35,280))
-
-
-    def animation2(spriteImages):
-        animate_sprite_at(spriteImages, FRONT, STILL, (35,280))
-
-        count = 0
-        for step in range (285,385,5):
-            animate_sprite_at(spriteImages, FRONT, count%3, (35,step))
-            count += 1
-        
-        animate_sprite_at(spriteImages, FRONT, STILL, (35,385))
-        animate_sprite_at(spriteImages, RIGHT, STILL, (35,385))
-
-        count = 0
-        for step in range (40,75,5):
-            animate_sprite_at(spriteImages, RIGHT, count%3, (step,385))
-            count += 1
-
-        animate_sprite_at(spriteImages, RIGHT, STILL, (75,385))
-    
-    def animation3(spriteImages):
-        animate_sprite_at(spriteImages, BACK, STILL, (75,385))
-
-        count = 0
-        for step in range (5,65,5):
-            animate_sprite_at(spriteImages, BACK, count%3, (75,385-step))
-            count += 1
-        
-        animate_sprite_at(spriteImages, BACK, STILL, (75,320))
-        animate_sprite_at(spriteImages, RIGHT, STILL, (75,320))
-
-        count = 0
-        for step in range (80,155,5):
-            animate_sprite_at(spriteImages, RIGHT, count%3, (step,320))
-            count += 1
-
-        animate_sprite_at(spriteImages, RIGHT, STILL, (155,320))
-        animate_sprite_at(spriteImages, BACK, STILL, (155,320))
-
-    def animation4(spriteImages):
-        animate_sprite_at(spriteImages, FRONT, STILL, (155,320))
-
-        count = 0
-        for step in range (325,355,5):
-            animate_sprite_at(spriteImages, FRONT, count%3, (155,step))
-            count += 1
-        
-        animate_sprite_at(spriteImages, FRONT, STILL, (155,360))
-        animate_sprite_at(spriteImages, RIGHT, STILL, (155,360))
-
-        count = 0
-        for step in range (155,245,5):
-            animate_sprite_at(spriteImages, RIGHT, count%3, (step,360))
-            count += 1
-
-        animate_sprite_at(spriteImages, RIGHT, STILL, (250,360))
-        animate_sprite_at(spriteImages, BACK, STILL, (250,360))
-
-        count = 0
-        for step in range (5,50,5):
-            animate_sprite_at(spriteImages, BACK, count%3, (250,360-step))
-            count += 1
-
-        animate_sprite_at(spriteImages, BACK, STILL, (250,310))
-        animate_sprite_at(spriteImages, RIGHT, STILL, (250,310))
-
-        count = 0
-        for step in range (255,305,5):
-            animate_sprite_at(spriteImages, RIGHT, count%3, (step,310))
-            count += 1
-
-        animate_sprite_at(spriteImages, RIGHT, STILL, (305,310))
-
-    def animation5(spriteImages):
-        animate_sprite_at(spriteImages, RIGHT, STILL, (305,310))
-
-        count = 0
-        for step in range (310,415,5):
-            animate_sprite_at(spriteImages, RIGHT, count%3, (step,310))
-            count += 1
-        
-        animate_sprite_at(spriteImages, RIGHT, STILL, (415,310))
-        animate_sprite_at(spriteImages, BACK, STILL, (415,310))
-
-        count = 0
-        for step in range (5,130,5):
-            animate_sprite_at(spriteImages, BACK, count%3, (415,310-step))
-            count += 1
-
-        animate_sprite_at(spriteImages, BACK, STILL, (415,180))
-        animate_sprite_at(spriteImages, RIGHT, STILL, (415,180))
-
-        count = 0
-        for step in range (420,430,5):
-            animate_sprite_at(spriteImages, RIGHT, count%3, (step,180))
-            count += 1
-
-        animate_sprite_at(spriteImages, RIGHT, STILL, (430,180))
-
-    def animation6(spriteImages):
-        animate_sprite_at(spriteImages, FRONT, STILL, (430,180))
-
-        count = 0
-        for step in range (185,410,5):
-            animate_sprite_at(spriteImages, FRONT, count%3, (430, step))
-            count += 1
-        
-        animate_sprite_at(spriteImages, FRONT, STILL, (430,410))
-        animate_sprite_at(spriteImages, LEFT, STILL, (430,410))
-
-        animate_sprite_at(spriteImages, LEFT, 0, (425,410))
-
-    def animation7(spriteImages):
-        animate_sprite_at(spriteImages, BACK, STILL, (425,410))
-
-        count = 0
-        for step in range (5,100,5):
-            animate_sprite_at(spriteImages, BACK, count%3, (425,410-step))
-            count += 1
-        
-        animate_sprite_at(spriteImages, BACK, STILL, (425,310))
-        animate_sprite_at(spriteImages, LEFT, STILL, (425,310))
-
-        count = 0
-        for step in range (5,120,5):
-            animate_sprite_at(spriteImages, LEFT, count%3, (425-step,310))
-            count += 1
-
-        animate_sprite_at(spriteImages, LEFT, STILL, (305,310))
-
-    def animation8(spriteImages):
-        animate_sprite_at(spriteImages, LEFT, STILL, (305,310))
-
-        count = 0
-        for step in range (5,55,5):
-            animate_sprite_at(spriteImages, LEFT, count%3, (305-step,310))
-            count += 1
-
-        animate_sprite_at(spriteImages, LEFT, STILL, (250,310))
-        animate_sprite_at(spriteImages, FRONT, STILL, (250,310))
-
-        count = 0
-        for step in range (315,360,5):
-            animate_sprite_at(spriteImages, FRONT, count%3, (250,step))
-            count += 1
-
-        animate_sprite_at(spriteImages, FRONT, STILL, (250,360))
-        animate_sprite_at(spriteImages, LEFT, STILL, (250,360))
-
-        count = 0
-        for step in range (5,95,5):
-            animate_sprite_at(spriteImages, LEFT, count%3, (250-step,360))
-            count += 1
-
-        animate_sprite_at(spriteImages, LEFT, STILL, (155,360))
-        animate_sprite_at(spriteImages, BACK, STILL, (155,360))
-
-        count = 0
-        for step in range (5,30,5):
-            animate_sprite_at(spriteImages, BACK, count%3, (155,360-step))
-            count += 1
-
-        animate_sprite_at(spriteImages, BACK, STILL, (155,330))
-        animate_sprite_at(spriteImages, LEFT, STILL, (155,330))
-
-        count = 0
-        for step in range (5,120,5):
-            animate_sprite_at(spriteImages, LEFT, count%3, (155-step,330))
-            count += 1
-
-        animate_sprite_at(spriteImages, LEFT, STILL, (35,330))
-        animate_sprite_at(spriteImages, BACK, STILL, (35,330))
-
-        count = 0
-        for step in range (5,50,5):
-            animate_sprite_at(spriteImages, BACK, count%3, (35,330-step))
-            count += 1
-
-        animate_sprite_at(spriteImages, BACK, STILL, (35,280))
-
-    def animation9(spriteImages):
-        animate_sprite_at(spriteImages, RIGHT, STILL, (35,280))
-
-        count = 0
-        for step in range (40,100,5):
-            animate_sprite_at(spriteImages, RIGHT, count%3, (step,280))
-            count +=1
-
-        animate_sprite_at(spriteImages, RIGHT, STILL, (100,280))
-        animate_sprite_at(spriteImages, BACK, STILL, (100,280))
-
-        count = 0
-        for step in range (5,135,5):
-            animate_sprite_at(spriteImages, BACK, count%3, (100,280-step))
-            count += 1
-
-        animate_sprite_at(spriteImages, BACK, STILL, (100,145))
-        animate_sprite_at(spriteImages, LEFT, STILL, (100,145))
-
-        count = 0
-        for step in range (5,30,5):
-            animate_sprite_at(spriteImages, LEFT, count%3, (100-step,145))
-            count += 1
-
-        animate_sprite_at(spriteImages, LEFT, STILL, (70,145))
-
-    spriteImages = setup_sprite()
-
-    resources = {
-        "bread": 2,
-        "wood": 2,
-        "stone": 0,
-        "gold": 0,
-        "sheep": 0
-    }
-
-    round_num = 1
-    game_over = False
+    amount_text = render_text(FONT, str(amount), BLACK)
+    amount_text_rect = amount_text.get_rect(center=VIEW.point((x + box_width - 20, y + box_height // 2)))
+    surface.blit(amount_text, amount_text_rect)
+
+    return box_rect.union(amount_text_rect)
+
+# The profiler overlay as (surface, pos), re-rendered at most every PROFILER_HUD_REFRESH_MS
+def profiler_hud():
+    global HUD_FONT, _hud
+    now = pygame.time.get_ticks()
+    if _hud is not None and now - _hud[0] < PROFILER_HUD_REFRESH_MS:
+        return _hud[1]
+    if HUD_FONT is None:
+        HUD_FONT = pygame.font.Font(None, 20)
+
+    stats = PROFILER.stats()
+    if stats is None:
+        lines = ["profiler: waiting for frames"]
+    else:
+        fps, frame_ms, sections = stats
+        lines = [f"{fps:.1f} fps", "frame " + "  ".join(f"p{p} {ms:.2f}" for p, ms in frame_ms.items()) + " ms"]
+        lines += [f"{name} {micros:.0f} us" for name, micros in sections[:PROFILER_HUD_SECTIONS]]
+    rendered = [HUD_FONT.render(line, True, WHITE) for line in lines]
+
+    # Opaque, so redrawing it over itself when something underneath changes is harmless
+    panel = pygame.Surface((max(line.get_width() for line in rendered) + 10,
+                            sum(line.get_height() for line in rendered) + 10))
+    panel.fill(BLACK)
+    y = 5
+    for line in rendered:
+        panel.blit(line, (5, y))
+        y += line.get_height()
+    _hud = (now, (panel, VIEW.point(PROFILER_HUD_POS)))
+    return _hud[1]
+
+# Draws the static scene once into a base surface, then only repaints what changed.
+# Each frame restores the old rects from the base, redraws the dynamic layers on top
+# (resource boxes, sprite, buttons) and pushes just those rects to the display.
+# The base is drawn for the current window size; a resize needs a new Renderer.
+class Renderer:
+    def __init__(self, surface, bg_image, stall_image, stall_positions):
+        self.surface = surface
+        self.base = surface.copy()
+        self.base.fill(BLACK)
+        self.base.fill(WHITE, VIEW.area)
+        self.base.blit(bg_image, VIEW.area)
+        pygame.draw.rect(self.base, LIGHT_GREY, VIEW.rect((0, 0, SCREEN_WIDTH, 75)))
+        for pos in stall_positions:
+            self.base.blit(stall_image, VIEW.point(pos[0]))
+
+        self.boxes = {}
+        self.buttons = {}
+        self.sprite = None
+        self.overlay = None
+        self.full_redraw = True
+        self.pixels_pushed = 0
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def draw_frame(self, resources, round_num, sprite_image, sprite_pos, buttons, overlay=None):
+        amounts = [min(round_num, 10)] + [resources[name] for _, name in RESOURCE_BOXES[1:]]
+        sprite = (sprite_image, sprite_pos)
+
+        if self.full_redraw:
+            self.surface.blit(self.base, (0, 0))
+            self.boxes = {}
+            self.buttons = {}
+            self.sprite = None
+            self.overlay = None
+
+        # Work out which layers changed since the last frame
+        dirty = []
+        changed_boxes = []
+        for (x, name), amount in zip(RESOURCE_BOXES, amounts):
+            drawn = self.boxes.get(name)
+            if drawn is None or drawn[0] != amount:
+                changed_boxes.append((x, name, amount))
+                if drawn:
+                    dirty.append(drawn[1])
+        changed_buttons = []
+        for button in buttons:
+            drawn = self.buttons.get(button)
+            if drawn is None or drawn[0] != button.content_version:
+                changed_buttons.append(button)
+                if drawn:
+                    dirty.append(drawn[1])
+        sprite_changed = self.sprite is None or self.sprite[:2] != sprite
+        if sprite_changed and self.sprite:
+            dirty.append(self.sprite[2])
+        overlay_changed = (self.overlay[:2] if self.overlay else None) != overlay
+        if overlay_changed and self.overlay:
+            dirty.append(self.overlay[2])
+
+        if not (changed_boxes or changed_buttons or sprite_changed or overlay_changed):
+            self.pixels_pushed = 0
+            return []
+
+        # Wipe stale pixels back to the static scene
+        with PROFILER.section("restore"):
+            for rect in dirty:
+                self.surface.blit(self.base, rect, rect)
+
+        # Anything still on screen that overlaps a wiped rect has to be redrawn as well
+        for x, name in RESOURCE_BOXES:
+            drawn = self.boxes.get(name)
+            if drawn and drawn[1].collidelist(dirty) != -1 and all(c[1] != name for c in changed_boxes):
+                changed_boxes.append((x, name, drawn[0]))
+        if self.sprite and not sprite_changed and self.sprite[2].collidelist(dirty) != -1:
+            sprite_changed = True
+        for button in buttons:
+            drawn = self.buttons.get(button)
+            if drawn and button not in changed_buttons and drawn[1].collidelist(dirty) != -1:
+                changed_buttons.append(button)
+
+        # Repaint in the original back-to-front order, with the overlay on top of everything
+        with PROFILER.section("boxes"):
+            for x, name, amount in changed_boxes:
+                rect = draw_resource_box(self.surface, x, 15, name, amount)
+                self.boxes[name] = (amount, rect)
+                dirty.append(rect)
+        with PROFILER.section("sprite"):
+            if sprite_changed:
+                rect = self.surface.blit(sprite_image, VIEW.point(sprite_pos))
+                self.sprite = (sprite_image, sprite_pos, rect)
+                dirty.append(rect)
+        with PROFILER.section("buttons"):
+            for button in changed_buttons:
+                rect = button.draw(self.surface)
+                self.buttons[button] = (button.content_version, rect)
+                dirty.append(rect)
+        if overlay is None:
+            self.overlay = None
+        elif overlay_changed or self.overlay[2].collidelist(dirty) != -1:
+            rect = self.surface.blit(*overlay)
+            self.overlay = (overlay[0], overlay[1], rect)
+            dirty.append(rect)
+
+        with PROFILER.section("present"):
+            if self.full_redraw:
+                self.full_redraw = False
+                dirty = [self.surface.get_rect()]
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty)
+        self.pixels_pushed = sum(rect.width * rect.height for rect in dirty)
+        return dirty
+
+
+def main(speed=1.0, animate=True, fps=TARGET_FPS, seed=None, record=SESSIONS_DIR, replay_log=None, connect=None,
+         leaderboard=LEADERBOARD_DB, hints=False, profile=False, trace_path=None, cprofile_path=None,
+         capture_dir=None, capture_format="deltas", window_size=None, fullscreen=False):
+    # A replay drives the game from the log instead of the mouse and isn't recorded again
+    if replay_log is not None:
+        seed, record, leaderboard = replay_log.seed, None, None
+    # Over the network the server owns the rules and this only draws the states it sends
+    try:
+        game = RemoteGame(connect, seed) if connect else Game(seed)
+    except OSError as error:
+        print(f"Can't connect to {connect}: {error}")
+        return
+
+    init_display(window_size, fullscreen)
+    animator = Animator(speed, animate)
+    log = SessionLog(game.seed) if record else None
+    # Opened now so its counts are loaded in the background long before the game ends
+    board = Leaderboard(leaderboard) if leaderboard else None
+    replay_pause = REPLAY_PAUSE_MS / speed
+    next_replay_at = pygame.time.get_ticks() + replay_pause
     selected_action = None
 
-    stall_character_positions = [
-        ((45, 85),(70,145),BACK), 
-        ((-20, 250),(35,280),LEFT),
-        ((80, 360),(75,385),RIGHT), 
-        ((130, 260),(155,320),BACK),
-        ((278, 255),(305,310),BACK), 
-        ((405,120),(430,180),BACK),
-        ((365, 382),(425,410),LEFT),
-        ((278, 255),(305,310),BACK), 
-        ((-20, 250),(35,280),LEFT),
-        ((45, 85),(70,145),BACK)
-    ]
+    stall_character_positions = STALL_CHARACTER_POSITIONS
 
     collect_button = Button(135, SCREEN_HEIGHT - 135, 150, 50, EARTHY_BROWN, WHITE, "collect")
     trade_button = Button(50, SCREEN_HEIGHT - 75, 300, 50, EARTHY_BROWN, WHITE, "trade")
 
-    stall_image = pygame.image.load("images/stall.png")
-    stall_image = pygame.transform.scale(stall_image, (80, 80))
+    startup_loads = ASSETS.disk_loads
 
-    bg_image = pygame.image.load("images/bg.jpg")
-    bg_image = pygame.transform.scale(bg_image, (SCREEN_WIDTH, SCREEN_HEIGHT))
+    renderer = Renderer(screen, ASSETS.get("bg"), ASSETS.get("stall_large"), stall_character_positions)
 
     stall_index = 0
 
-
-    resource_to_collect = random.choice(list(resources.keys()))
-    trade_from = random.choice([res for res in resources if resources[res] > 0])
-    trade_to = random.choice([res for res in resources if res != trade_from])
-    trade_amount = random.randint(1, min(3, resources[trade_from]))
-    trade_to_amount = random.randint(2, 4)
-
-    update_buttons(collect_button, trade_button, resource_to_collect, trade_to, trade_from, trade_to_amount, trade_amount)
-
-    while not game_over:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                game_over = True
-
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if collect_button.is_clicked(event.pos):
-                    selected_action = "collect"
-                elif trade_button.is_clicked(event.pos):
-                    selected_action = "trade"
-
-        if selected_action:
-            if selected_action == "collect":
-                if resources[resource_to_collect] < 10:
-                    resources[resource_to_collect] += 1
-
-                    resource_to_collect = random.choice(list(resources.keys()))
-                    trade_from = random.choice([res for res in resources if resources[res] > 0])
-                    trade_to = random.choice([res for res in resources if res != trade_from])
-                    trade_amount = random.randint(1, min(3, resources[trade_from]))
-                    trade_to_amount = random.randint(2, 4)
-
-                    while resources[resource_to_collect] == 10 and resources[trade_to] + trade_to_amount > 10:
-                        resource_to_collect = random.choice(list(resources.keys()))
-                        trade_from = random.choice([res for res in resources if resources[res] > 0])
-                        trade_to = random.choice([res for res in resources if res != trade_from])
-                        trade_amount = random.randint(1, min(3, resources[trade_from]))
-                        trade_to_amount = random.randint(2, 4)
-
-                    round_num += 1
-                    stall_index = (stall_index + 1) % len(stall_character_positions)
-                    update_buttons(collect_button, trade_button, resource_to_collect, trade_to, trade_from, trade_to_amount, trade_amount)
-                    selected_action = None
-
-                    move_sprite(spriteImages,stall_index)
-
-            elif selected_action == "trade":
-                if resources[trade_from] >= trade_amount:
-                    if resources[trade_to] + trade_to_amount <= 10:
-                        resources = trade_resources(resources, trade_from, trade_to, trade_amount, trade_to_amount)
-
-                        resource_to_collect = random.choice(list(resources.keys()))
-                        trade_from = random.choice([res for res in resources if resources[res] > 0])
-                        trade_to = random.choice([res for res in resources if res != trade_from])
-                        trade_amount = random.randint(1, min(3, resources[trade_from]))
-                        trade_to_amount = random.randint(2, 4)
-
-                        while resources[resource_to_collect] == 10 and resources[trade_to] + trade_to_amount > 10:
-                            resource_to_collect = random.choice(list(resources.keys()))
-                            trade_from = random.choice([res for res in resources if resources[res] > 0])
-                            trade_to = random.choice([res for res in resources if res != trade_from])
-                            trade_amount = random.randint(1, min(3, resources[trade_from]))
-                            trade_to_amount = random.randint(2, 4)
-
-                        round_num += 1
-                        stall_index = (stall_index + 1) % len(stall_character_positions)
-                        update_buttons(collect_button, trade_button, resource_to_collect, trade_to, trade_from, trade_to_amount, trade_amount)
-                        selected_action = None
-
-                        move_sprite(spriteImages,stall_index)
-
-        if round_num > 10:
-            display_game_over(resources)
+    # H toggles the hint; the table is only mapped the first time it's wanted
+    hint_values = load_hints() if hints else None
+    show_offer(collect_button, trade_button, game.state.offer, hint_for(hint_values, game.state))
+
+    # Sections cost next to nothing unless the overlay or a trace has switched the profiler on
+    show_profiler = profile
+    if trace_path:
+        PROFILER.start_trace()
+    PROFILER.enabled = show_profiler or PROFILER.trace is not None
+    if cprofile_path:
+        PROFILER.start_cprofile()
+    hud_drawn_at = 0
+
+    # Frames are copied here and written out by a background thread
+    recorder = Recorder(capture_dir, screen.get_size(), capture_format) if capture_dir else None
+
+    clock = pygame.time.Clock()
+    needs_redraw = True
+    quit_requested = False
+
+    while not quit_requested:
+        # Nothing is moving: sleep until the player does something
+        replaying = replay_log is not None and game.state.round <= len(replay_log.rounds)
+        if animator.active or needs_redraw:
+            events = pygame.event.get()
+        else:
+            timeout = IDLE_TIMEOUT_MS
+            if replaying:
+                timeout = max(1, min(timeout, int(next_replay_at - pygame.time.get_ticks())))
+            if show_profiler:
+                timeout = min(timeout, PROFILER_HUD_REFRESH_MS)
+            event = pygame.event.wait(timeout)
+            events = [event] + pygame.event.get() if event.type != pygame.NOEVENT else []
+        PROFILER.begin_frame()
+
+        with PROFILER.section("events"):
+            for event in events:
+                if event.type == pygame.QUIT:
+                    quit_requested = True
+
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    show_profiler = not show_profiler
+                    PROFILER.enabled = show_profiler or PROFILER.trace is not None
+                    PROFILER.reset()
+                    needs_redraw = True
+
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_h and not game.over:
+                    hints = not hints
+                    if hints and hint_values is None:
+                        hint_values = load_hints()
+                    show_offer(collect_button, trade_button, game.state.offer,
+                               hint_for(hint_values, game.state) if hints else None)
+                    needs_redraw = True
+
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                    animator.skip()
+                    needs_redraw = True
+
+                # The window contents may have been lost, so repaint everything
+                if event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    renderer.invalidate()
+                    needs_redraw = True
+
+                # Everything is rescaled here, once per new size, rather than while drawing
+                if event.type == pygame.VIDEORESIZE and pygame.display.get_surface().get_size() != VIEW.window_size:
+                    resize_display()
+                    renderer = Renderer(screen, ASSETS.get("bg"), ASSETS.get("stall_large"),
+                                        stall_character_positions)
+                    if not game.over:
+                        show_offer(collect_button, trade_button, game.state.offer,
+                                   hint_for(hint_values, game.state) if hints else None)
+                    needs_redraw = True
+
+                if event.type == pygame.MOUSEBUTTONDOWN and replay_log is None:
+                    pos = VIEW.to_logical(event.pos)
+                    if collect_button.is_clicked(pos):
+                        selected_action = COLLECT
+                    elif trade_button.is_clicked(pos):
+                        selected_action = TRADE
+
+        # The next logged action is taken once the sprite has stood still for a moment
+        if replaying and animator.active:
+            next_replay_at = pygame.time.get_ticks() + replay_pause
+        elif replaying and pygame.time.get_ticks() >= next_replay_at:
+            offer, selected_action = replay_log.rounds[game.state.round - 1]
+            if offer != game.state.offer or selected_action not in game.legal_actions():
+                print(f"Replay diverges from the log in round {game.state.round}")
+                break
+
+        # An impossible choice stays selected but does nothing, as before
+        if selected_action is not None and selected_action in game.legal_actions():
+            offer = game.state.offer
+            with PROFILER.section("step"):
+                try:
+                    game.step(selected_action)
+                except OSError as error:
+                    print(f"Lost the connection to {connect}: {error}")
+                    break
+                if log is not None:
+                    log.record(offer, selected_action)
+                selected_action = None
+                next_replay_at = pygame.time.get_ticks() + replay_pause
+
+                stall_index = (stall_index + 1) % len(stall_character_positions)
+                if not game.over:
+                    show_offer(collect_button, trade_button, game.state.offer,
+                               hint_for(hint_values, game.state) if hints else None)
+            animator.start(waypoints(stall_character_positions, stall_index), pygame.time.get_ticks() / 1000)
+            needs_redraw = True
+
+        resources = dict(zip(RESOURCES, game.state.resources))
+        if game.over:
+            display_game_over(resources, board.submit(game.score(), game.seed) if board else None)
+            if recorder is not None:
+                recorder.capture(screen, [screen.get_rect()])
             break
 
-        screen.fill(WHITE)
-        screen.blit(bg_image, (0, 0))
-        pygame.draw.rect(screen, LIGHT_GREY, (0, 0, SCREEN_WIDTH, 75))
-
-        # Render resource boxes
-        draw_resource_box(15, 15, "stall", min(round_num, 10))
-        draw_resource_box(100, 15, "wood", resources["wood"])
-        draw_resource_box(185, 15, "bread", resources["bread"])
-        draw_resource_box(270, 15, "stone", resources["stone"])
-        draw_resource_box(355, 15, "gold", resources["gold"])
-        draw_resource_box(440, 15, "sheep", resources["sheep"])
-
-
-        for pos in stall_character_positions:
-            screen.blit(stall_image, pos[0])
-
-        state = stall_character_positions[stall_index]
-        put_sprite_at(spriteImages,state[2],STILL, state[1])
-
-        collect_button.draw(screen)
-        trade_button.draw(screen)
-
-        pygame.display.flip()
-        pygame.time.wait(300)
-
+        if show_profiler and pygame.time.get_ticks() - hud_drawn_at >= PROFILER_HUD_REFRESH_MS:
+            needs_redraw = True
+        if not (animator.active or needs_redraw):
+            continue
+
+        # The walk is sampled from the clock, so a slow frame never slows the sprite down
+        walking = animator.active
+        with PROFILER.section("walk"):
+            frame = animator.update(pygame.time.get_ticks() / 1000)
+        if frame:
+            direction, pose, pos = frame
+        else:
+            state = stall_character_positions[stall_index]
+            direction, pose, pos = state[2], STILL, state[1]
+        overlay = None
+        if show_profiler:
+            overlay = profiler_hud()
+            hud_drawn_at = pygame.time.get_ticks()
+        with PROFILER.section("render"):
+            presented = renderer.draw_frame(resources, game.state.round, ASSETS.sprite(direction, pose), pos,
+                                            (collect_button, trade_button), overlay)
+        if recorder is not None:
+            with PROFILER.section("capture"):
+                recorder.capture(screen, presented)
+        PROFILER.end_frame()
+        needs_redraw = False
+
+        if walking:
+            clock.tick(fps)
+
+    if log is not None and log.rounds:
+        log.score = game.score()
+        path = session_path(record, game.seed)
+        write_log(path, log)
+        print(f"Session recorded to {path}")
+
+    if connect:
+        game.close()
+
+    if recorder is not None:
+        recorder.close()
+        print(f"Captured {recorder.written} frames to {capture_dir} ({recorder.dropped} dropped)")
+
+    if cprofile_path:
+        PROFILER.save_cprofile(cprofile_path)
+        print(f"cProfile stats written to {cprofile_path}")
+    if trace_path:
+        PROFILER.save_trace(trace_path)
+        print(f"Chrome trace written to {trace_path}")
+
+    print(f"Asset disk loads: {startup_loads} at startup, {ASSETS.disk_loads - startup_loads} during play")
     pygame.time.wait(10000)
+    if board is not None:
+        board.close()
+        if board.error is not None:
+            print(f"Score not recorded: {board.error}")
     pygame.quit()
 
+# Session logs store the seed as an unsigned 64-bit integer
+def seed_arg(text):
+    try:
+        seed = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"seed must be an integer, not {text!r}")
+    if not 0 <= seed < 1 << 64:
+        raise argparse.ArgumentTypeError(f"seed must be between 0 and 2**64 - 1, not {seed}")
+    return seed
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Resource Game")
+    parser.add_argument("--speed", type=float, default=1.0, help="walk animation speed multiplier")
+    parser.add_argument("--skip-animations", action="store_true", help="jump straight to the next stall")
+    parser.add_argument("--fps", type=int, default=TARGET_FPS, help="frame rate cap while animating")
+    parser.add_argument("--seed", type=seed_arg, help="seed for the offer generator")
+    parser.add_argument("--record", default=SESSIONS_DIR, metavar="DIR", help="directory for session logs")
+    parser.add_argument("--no-record", action="store_const", const=None, dest="record", help="don't log the session")
+    parser.add_argument("--replay", metavar="LOG", help="play back a recorded session")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="play on a server started with server.py")
+    parser.add_argument("--hints", action="store_true", help="outline the best move (toggle with H)")
+    parser.add_argument("--profile", action="store_true", help="show the frame profiler overlay (toggle with F3)")
+    parser.add_argument("--trace", metavar="JSON", help="write a Chrome trace of the profiled sections")
+    parser.add_argument("--cprofile", metavar="FILE", help="write cProfile stats for the session")
+    parser.add_argument("--leaderboard", default=LEADERBOARD_DB, metavar="DB", help="high-score database")
+    parser.add_argument("--no-leaderboard", action="store_const", const=None, dest="leaderboard",
+                        help="don't record the score")
+    parser.add_argument("--window", metavar="WxH", help="initial window size (default: the layout's 526x595)")
+    parser.add_argument("--fullscreen", action="store_true", help="fill the screen at its native resolution")
+    parser.add_argument("--capture", metavar="DIR", help="record every presented frame into DIR")
+    parser.add_argument("--capture-format", choices=FORMATS, default="deltas",
+                        help="changed rects only (convert later with capture.py) or one PNG per frame")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+    if args.fps <= 0:
+        parser.error("--fps must be positive")
+    if args.connect:
+        try:
+            parse_address(args.connect)
+        except ValueError as error:
+            parser.error(f"--connect: {error}")
+    window_size = None
+    if args.window:
+        try:
+            window_size = tuple(int(n) for n in args.window.lower().split("x"))
+        except ValueError:
+            window_size = ()
+        if len(window_size) != 2 or min(window_size) <= 0:
+            parser.error("--window must look like 1280x1440")
+    replay_log = None
+    if args.replay:
+        try:
+            replay_log = read_log(args.replay)
+        except (OSError, ReplayError) as e:
+            parser.error(f"can't replay {args.replay}: {e}")
+    main(args.speed, not args.skip_animations, args.fps, args.seed, args.record,
+         replay_log, args.connect, args.leaderboard, args.hints,
+         args.profile, args.trace, args.cprofile, args.capture, args.capture_format, window_size, args.fullscreen)
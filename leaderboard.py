@@ -0,0 +1,167 @@
+# Persistent high scores in a local SQLite file (WAL mode), written in batches by a background thread.
+#
+# Every score is also counted in score_counts, one row per possible score (0..500), so a rank
+# is a sum over at most 501 counts whatever the table size. The writer keeps a copy of those
+# counts in memory, which is what submit() and rank() answer from: the caller never waits on disk.
+import queue
+import sqlite3
+import threading
+import time
+
+from core import CAP, RESOURCES
+
+LEADERBOARD_DB = "leaderboard.db"
+MAX_SCORE = CAP * CAP * len(RESOURCES)
+BATCH_SIZE = 1000
+FLUSH_SECONDS = 0.2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    score INTEGER NOT NULL,
+    seed TEXT,
+    played_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, id);
+CREATE TABLE IF NOT EXISTS score_counts (
+    score INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+"""
+
+def connect(path):
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    return db
+
+class Leaderboard:
+    def __init__(self, path=LEADERBOARD_DB):
+        self.path = path
+        self.pending = queue.Queue()
+        self.counts = [0] * (MAX_SCORE + 1)
+        self.unwritten = [0] * (MAX_SCORE + 1)
+        self.lock = threading.Lock()
+        self.loaded = threading.Event()
+        self.error = None
+        self.reader = None
+        self.writer = threading.Thread(target=self.write_loop, name="leaderboard-writer", daemon=True)
+        self.writer.start()
+
+    # Queues the score and returns its (rank, total) straight away, or None without a database
+    def submit(self, score, seed=None):
+        self.loaded.wait()
+        if self.error is not None:
+            return None
+        with self.lock:
+            self.counts[score] += 1
+            self.unwritten[score] += 1
+            self.pending.put((score, None if seed is None else str(seed), time.time()))
+        return self.rank(score)
+
+    # 1-based rank among everything recorded so far; ties share the better rank
+    def rank(self, score):
+        self.loaded.wait()
+        if self.error is not None:
+            return None
+        with self.lock:
+            return 1 + sum(self.counts[score + 1:]), sum(self.counts)
+
+    # Share of recorded scores strictly below this one, in percent
+    def percentile(self, score):
+        self.loaded.wait()
+        if self.error is not None:
+            return None
+        with self.lock:
+            total = sum(self.counts)
+            return 100.0 * sum(self.counts[:score]) / total if total else 100.0
+
+    # Reads through a separate connection; WAL lets it run alongside the writer
+    def top(self, k=10):
+        self.flush()
+        if self.reader is None:
+            self.reader = connect(self.path)
+        return self.reader.execute(
+            "SELECT score, seed, played_at FROM scores ORDER BY score DESC, id LIMIT ?", (k,)).fetchall()
+
+    def flush(self):
+        self.pending.join()
+
+    def close(self):
+        self.pending.put(None)
+        self.writer.join()
+        if self.reader is not None:
+            self.reader.close()
+
+    # If the file can't be opened or written, the error is kept in self.error and the scores
+    # are dropped: submit() and rank() return None instead of leaving the game waiting
+    def write_loop(self):
+        db = None
+        closed = False
+        try:
+            db = connect(self.path)
+            self.reload_counts(db)
+            self.loaded.set()
+            while not closed:
+                batch = [self.pending.get()]
+                deadline = time.monotonic() + FLUSH_SECONDS
+                while batch[-1] is not None and len(batch) < BATCH_SIZE:
+                    try:
+                        batch.append(self.pending.get(timeout=max(0.0, deadline - time.monotonic())))
+                    except queue.Empty:
+                        break
+                closed = batch[-1] is None
+                try:
+                    self.write_rows(db, [row for row in batch if row is not None])
+                finally:
+                    for _ in batch:
+                        self.pending.task_done()
+        except sqlite3.Error as error:
+            self.error = error
+            self.loaded.set()
+        if db is not None:
+            db.close()
+        # Whatever is still queued after a failure is dropped, so flush() and close() return
+        while not closed:
+            closed = self.pending.get() is None
+            self.pending.task_done()
+
+    def write_rows(self, db, rows):
+        if not rows:
+            return
+        with db:
+            db.executemany("INSERT INTO scores (score, seed, played_at) VALUES (?, ?, ?)", rows)
+            db.executemany("INSERT INTO score_counts (score, count) VALUES (?, 1) "
+                           "ON CONFLICT (score) DO UPDATE SET count = count + 1", [(row[0],) for row in rows])
+        with self.lock:
+            for row in rows:
+                self.unwritten[row[0]] -= 1
+        # Picks up scores other processes wrote to the same file
+        self.reload_counts(db)
+
+    def reload_counts(self, db):
+        counts = [0] * (MAX_SCORE + 1)
+        for score, count in db.execute("SELECT score, count FROM score_counts"):
+            counts[score] = count
+        # Scores submitted but not yet written are still owed to the in-memory copy
+        with self.lock:
+            self.counts = [written + owed for written, owed in zip(counts, self.unwritten)]
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show the high-score table")
+    parser.add_argument("--db", default=LEADERBOARD_DB)
+    parser.add_argument("-k", "--top", type=int, default=10)
+    args = parser.parse_args()
+
+    board = Leaderboard(args.db)
+    board.loaded.wait()
+    if board.error is not None:
+        board.close()
+        parser.error(f"can't open {args.db}: {board.error}")
+    for place, (score, seed, played_at) in enumerate(board.top(args.top), 1):
+        print(f"{place:>4}. {score:>4}  {time.strftime('%Y-%m-%d %H:%M', time.localtime(played_at))}  seed {seed}")
+    print(f"{board.rank(0)[1]:,} games recorded")
+    board.close()
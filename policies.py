@@ -0,0 +1,65 @@
+# Vectorized policies for BatchGames: each takes the batch and returns an (N,) action array
+import numpy as np
+
+from batch import N_RESOURCES, OFFER_COLLECT, OFFER_FROM, OFFER_TO, OFFER_AMOUNT, OFFER_TO_AMOUNT
+from core import ROUNDS, COLLECT, TRADE
+from solver import PLACE, load_policy
+
+# Change in the sum of squares from each option
+def square_gains(games):
+    offers = games.offers
+    held = games.held(offers[:, OFFER_COLLECT]).astype(np.int16)
+    collect_gain = 2 * held + 1
+
+    given = games.held(offers[:, OFFER_FROM]).astype(np.int16)
+    got = games.held(offers[:, OFFER_TO]).astype(np.int16)
+    amount, to_amount = offers[:, OFFER_AMOUNT], offers[:, OFFER_TO_AMOUNT]
+    trade_gain = (got + to_amount) ** 2 - got ** 2 + (given - amount) ** 2 - given ** 2
+    return collect_gain, trade_gain
+
+def random_policy(games):
+    return np.where(games.policy_rng.random(games.n) < 0.5, COLLECT, TRADE)
+
+def greedy(games):
+    collect_gain, trade_gain = square_gains(games)
+    return np.where(trade_gain > collect_gain, TRADE, COLLECT)
+
+def always_collect(games):
+    return np.full(games.n, COLLECT)
+
+# Keeps the stock as even as possible: the option leaving the smaller variance
+def balanced(games):
+    collect_gain, trade_gain = square_gains(games)
+    r = games.resources.astype(np.int16)
+    squares, total = (r * r).sum(axis=1), r.sum(axis=1)
+    offers = games.offers
+    trade_total = total - offers[:, OFFER_AMOUNT] + offers[:, OFFER_TO_AMOUNT]
+    collect_spread = N_RESOURCES * (squares + collect_gain) - (total + 1) ** 2
+    trade_spread = N_RESOURCES * (squares + trade_gain) - trade_total ** 2
+    return np.where(trade_spread < collect_spread, TRADE, COLLECT)
+
+# The exact policy from solver.py, read from its value table
+_values = None
+
+def optimal(games):
+    global _values
+    if _values is None:
+        _values = load_policy()
+    index = games.resources.astype(np.int64) @ PLACE
+    offers = games.offers.astype(np.int64)
+    collect_next = index + PLACE[offers[:, OFFER_COLLECT]]
+    trade_next = index - offers[:, OFFER_AMOUNT] * PLACE[offers[:, OFFER_FROM]] + \
+        offers[:, OFFER_TO_AMOUNT] * PLACE[offers[:, OFFER_TO]]
+    playing = np.minimum(games.round, ROUNDS) + 1
+    collect_ok, trade_ok = games.legal_collect(), games.legal_trade()
+    collect_value = np.where(collect_ok, _values[playing, np.where(collect_ok, collect_next, 0)], -1)
+    trade_value = np.where(trade_ok, _values[playing, np.where(trade_ok, trade_next, 0)], -1)
+    return np.where(trade_value > collect_value, TRADE, COLLECT)
+
+POLICIES = {
+    "random": random_policy,
+    "greedy": greedy,
+    "always_collect": always_collect,
+    "balanced": balanced,
+    "optimal": optimal,
+}
@@ -0,0 +1,125 @@
+# Named-section frame timing for the game loop, with optional cProfile and Chrome-trace output.
+#
+# Everything is off by default: section() then hands back one shared no-op context manager, so
+# the instrumentation can stay in the loop. Nothing here depends on pygame; game.py draws the HUD.
+#
+# Sections may nest. Per-frame section costs are exclusive: time spent in a nested section counts
+# towards that section only, so the costs add up to no more than the frame. Trace events keep
+# each section's full span, which trace viewers draw nested.
+import contextlib
+import cProfile
+import json
+import os
+import time
+from collections import deque
+
+FRAME_WINDOW = 240
+TRACE_LIMIT = 1_000_000
+
+NULL_SECTION = contextlib.nullcontext()
+
+class Section:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.nested.append(0)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        nested = self.profiler.nested
+        inner = nested.pop()
+        if nested:
+            nested[-1] += end - self.start
+        self.profiler.record(self.name, self.start, end, inner)
+        return False
+
+class Profiler:
+    def __init__(self, window=FRAME_WINDOW):
+        self.enabled = False
+        self.window = window
+        self.frame_start = None
+        self.frame_times = deque(maxlen=window)
+        self.frame_ends = deque(maxlen=window)
+        self.current = {}
+        self.sections = {}
+        # Time taken by nested sections, one entry per open section
+        self.nested = []
+        self.trace = None
+        self.cprofile = None
+
+    def section(self, name):
+        if not self.enabled:
+            return NULL_SECTION
+        return Section(self, name)
+
+    # inner is the time nested sections took, which isn't counted again here
+    def record(self, name, start, end, inner=0):
+        self.current[name] = self.current.get(name, 0) + end - start - inner
+        self.add_trace_event(name, start, end)
+
+    def add_trace_event(self, name, start, end):
+        if self.trace is not None and len(self.trace) < TRACE_LIMIT:
+            self.trace.append({"name": name, "ph": "X", "ts": start / 1000, "dur": (end - start) / 1000,
+                               "pid": os.getpid(), "tid": 0})
+
+    # Opens a frame. Sections timed since the last begin_frame() belonged to a loop pass that drew
+    # nothing, so they are dropped rather than charged to this frame.
+    def begin_frame(self):
+        if self.enabled:
+            self.frame_start = time.perf_counter_ns()
+            self.current.clear()
+
+    # Closes the frame opened by begin_frame(); section time since then counts towards it
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        end = time.perf_counter_ns()
+        self.add_trace_event("frame", self.frame_start, end)
+        self.frame_times.append(end - self.frame_start)
+        self.frame_ends.append(end)
+        self.frame_start = None
+        for name in self.sections.keys() | self.current.keys():
+            self.sections.setdefault(name, deque(maxlen=self.window)).append(self.current.get(name, 0))
+        self.current.clear()
+
+    def reset(self):
+        self.frame_start = None
+        self.frame_times.clear()
+        self.frame_ends.clear()
+        self.current.clear()
+        self.sections.clear()
+
+    # FPS over the window, frame-time percentiles in ms and mean per-frame exclusive cost of each section in us
+    def stats(self, percentiles=(50, 95, 99)):
+        times = sorted(self.frame_times)
+        if not times:
+            return None
+        span = self.frame_ends[-1] - self.frame_ends[0]
+        fps = (len(self.frame_ends) - 1) * 1e9 / span if span else 0.0
+        frame_ms = {p: times[min(len(times) - 1, len(times) * p // 100)] / 1e6 for p in percentiles}
+        sections = sorted(((name, sum(totals) / len(totals) / 1000) for name, totals in self.sections.items()),
+                          key=lambda item: -item[1])
+        return fps, frame_ms, sections
+
+    def start_trace(self):
+        self.trace = []
+        self.enabled = True
+
+    # Chrome's about:tracing and Perfetto both open this format
+    def save_trace(self, path):
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace or [], "displayTimeUnit": "ms"}, f)
+
+    def start_cprofile(self):
+        self.cprofile = cProfile.Profile()
+        self.cprofile.enable()
+
+    def save_cprofile(self, path):
+        self.cprofile.disable()
+        self.cprofile.dump_stats(path)
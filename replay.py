@@ -0,0 +1,150 @@
+# Compact binary session logs: the seed, then each round's offer and chosen action in two bytes.
+# Replaying re-runs the seed through core and checks every logged offer against it.
+import os
+import struct
+import time
+
+from core import ROUNDS, Game
+
+MAGIC = b"RGLOG"
+VERSION = 1
+HEADER = struct.Struct("<5sBQB")
+ROUND = struct.Struct("<H")
+TRAILER = struct.Struct("<H")
+LOG_SUFFIX = ".rglog"
+
+class ReplayError(ValueError):
+    pass
+
+# collect:3 | trade_from:3 | trade_to:3 | trade_amount-1:2 | trade_to_amount-2:2 | action:1
+def encode_round(offer, action):
+    collect, trade_from, trade_to, trade_amount, trade_to_amount = offer
+    return (collect | trade_from << 3 | trade_to << 6 | (trade_amount - 1) << 9 |
+            (trade_to_amount - 2) << 11 | action << 13)
+
+def decode_round(value):
+    offer = (value & 7, value >> 3 & 7, value >> 6 & 7, (value >> 9 & 3) + 1, (value >> 11 & 3) + 2)
+    return offer, value >> 13 & 1
+
+class SessionLog:
+    __slots__ = ("seed", "rounds", "score")
+
+    def __init__(self, seed, rounds=None, score=0):
+        if not 0 <= seed < 1 << 64:
+            raise ValueError(f"seed {seed} does not fit in 64 bits")
+        self.seed = seed
+        self.rounds = rounds if rounds is not None else []
+        self.score = score
+
+    @property
+    def actions(self):
+        return [action for _, action in self.rounds]
+
+    def record(self, offer, action):
+        self.rounds.append((offer, action))
+
+    def to_bytes(self):
+        parts = [HEADER.pack(MAGIC, VERSION, self.seed, len(self.rounds))]
+        parts += [ROUND.pack(encode_round(offer, action)) for offer, action in self.rounds]
+        parts.append(TRAILER.pack(self.score))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER.size + TRAILER.size:
+            raise ReplayError("log is truncated")
+        magic, version, seed, count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ReplayError("not a session log")
+        if count > ROUNDS or len(data) != HEADER.size + count * ROUND.size + TRAILER.size:
+            raise ReplayError("log length does not match its round count")
+        rounds = [decode_round(value) for value, in ROUND.iter_unpack(data[HEADER.size:HEADER.size + count * ROUND.size])]
+        score, = TRAILER.unpack_from(data, len(data) - TRAILER.size)
+        return cls(seed, rounds, score)
+
+# Written aside and renamed, so a directory watcher never sees half a log
+def write_log(path, log):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(log.to_bytes())
+    os.replace(tmp_path, path)
+
+def read_log(path):
+    with open(path, "rb") as f:
+        return SessionLog.from_bytes(f.read())
+
+def session_path(directory, seed):
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{seed}{LOG_SUFFIX}")
+
+# Re-executes a log headlessly; returns the final Game or raises ReplayError on any divergence
+def replay(log):
+    game = Game(log.seed)
+    for number, (offer, action) in enumerate(log.rounds, 1):
+        if game.state.offer != offer:
+            raise ReplayError(f"round {number}: seed gives offer {game.state.offer}, log has {offer}")
+        if action not in game.legal_actions():
+            raise ReplayError(f"round {number}: action {action} is not legal")
+        game.step(action)
+    if game.over and game.score() != log.score:
+        raise ReplayError(f"log claims {log.score}, replay scores {game.score()}")
+    return game
+
+def record_random_sessions(directory, count, seed=0):
+    import random
+
+    rng = random.Random(seed)
+    for _ in range(count):
+        game = Game(rng.getrandbits(64))
+        log = SessionLog(game.seed)
+        while not game.over:
+            action = rng.choice(game.legal_actions())
+            log.record(game.state.offer, action)
+            game.step(action)
+        log.score = game.score()
+        write_log(os.path.join(directory, f"{game.seed}{LOG_SUFFIX}"), log)
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Verify or generate recorded sessions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    verify = commands.add_parser("verify", help="replay logs headlessly at full speed")
+    verify.add_argument("paths", nargs="+", help="log files or directories")
+    generate = commands.add_parser("generate", help="record random sessions for testing")
+    generate.add_argument("directory")
+    generate.add_argument("-n", "--count", type=int, default=1000)
+    generate.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        os.makedirs(args.directory, exist_ok=True)
+        record_random_sessions(args.directory, args.count, args.seed)
+        print(f"Wrote {args.count} sessions to {args.directory}")
+    else:
+        paths = []
+        for path in args.paths:
+            paths += sorted(glob.glob(os.path.join(path, "*" + LOG_SUFFIX))) if os.path.isdir(path) else [path]
+        # Logs are read up front so the timing covers replaying only; one that can't be read
+        # counts as a failure like one that doesn't replay
+        logs = []
+        failures = 0
+        for path in paths:
+            try:
+                logs.append((path, read_log(path)))
+            except (ReplayError, OSError) as error:
+                failures += 1
+                print(f"{path}: {error}")
+
+        start = time.perf_counter()
+        for path, log in logs:
+            try:
+                replay(log)
+            except ReplayError as error:
+                failures += 1
+                print(f"{path}: {error}")
+        elapsed = time.perf_counter() - start
+        print(f"{len(paths) - failures}/{len(paths)} sessions verified in {elapsed:.2f}s "
+              f"({len(logs) / max(elapsed, 1e-9):,.0f} sessions/s)")
+        raise SystemExit(1 if failures else 0)
@@ -0,0 +1,104 @@
+# Hosts many independent games over TCP on one asyncio loop; each connection plays its own session.
+#
+# The protocol is one ASCII line per message. The client sends
+#   NEW [seed]        start a game (a random seed if none is given)
+#   COLLECT | TRADE   take the current offer
+#   QUIT              close the connection
+# and the server answers every command with one line:
+#   GAME seed round r,r,r,r,r c,f,t,a,b   a new game or the state after a move
+#   OVER seed score r,r,r,r,r             the game has finished
+#   ERROR message                         the command was rejected; the state is unchanged
+# Resources and offers are indices as in core.
+import asyncio
+
+from core import ACTIONS, ROUNDS, Game, GameState, legal_actions, score
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7420
+MAX_LINE = 256
+
+COMMANDS = {name.upper(): action for action, name in enumerate(ACTIONS)}
+
+def format_ints(values):
+    return ",".join(map(str, values))
+
+def parse_ints(text):
+    return tuple(int(value) for value in text.split(","))
+
+def format_state(seed, state):
+    if state.over:
+        return f"OVER {seed} {score(state.resources)} {format_ints(state.resources)}\n"
+    return f"GAME {seed} {state.round} {format_ints(state.resources)} {format_ints(state.offer)}\n"
+
+# Returns (seed, GameState) for a GAME or OVER line; raises ValueError for ERROR or garbage
+def parse_state(line):
+    kind, _, rest = line.strip().partition(" ")
+    if kind == "ERROR":
+        raise ValueError(rest)
+    fields = rest.split()
+    if kind == "GAME" and len(fields) == 4:
+        return int(fields[0]), GameState(parse_ints(fields[2]), int(fields[1]), parse_ints(fields[3]))
+    if kind == "OVER" and len(fields) == 3:
+        return int(fields[0]), GameState(parse_ints(fields[2]), ROUNDS + 1, None)
+    raise ValueError(f"unexpected reply {line!r}")
+
+# Turns one command line into one reply line, updating the connection's game in place
+def handle_command(game, line):
+    command, _, argument = line.strip().partition(" ")
+    command = command.upper()
+    if command == "NEW":
+        try:
+            seed = int(argument) if argument else None
+            if seed is not None and not 0 <= seed < 1 << 64:
+                raise ValueError
+        except ValueError:
+            return game, "ERROR seed must be an integer in [0, 2**64)\n"
+        game = Game(seed)
+        return game, format_state(game.seed, game.state)
+    if command in COMMANDS:
+        if game is None:
+            return game, "ERROR no game; send NEW first\n"
+        action = COMMANDS[command]
+        if action not in legal_actions(game.state):
+            return game, f"ERROR cannot {command.lower()} in round {game.state.round}\n"
+        game.step(action)
+        return game, format_state(game.seed, game.state)
+    return game, f"ERROR unknown command {command!r}\n"
+
+# One coroutine per connection, and the session is just its local Game
+# (a few tuples and the seeded RNG); there are no per-session threads or timers
+async def handle_connection(reader, writer):
+    game = None
+    try:
+        while True:
+            line = await reader.readline()
+            if not line or line.strip().upper() == b"QUIT":
+                break
+            game, reply = handle_command(game, line.decode("ascii", "replace"))
+            writer.write(reply.encode("ascii"))
+            await writer.drain()
+    # readline raises ValueError for a line longer than MAX_LINE
+    except (ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+    listener = await asyncio.start_server(handle_connection, host, port, limit=MAX_LINE, backlog=4096)
+    if ready is not None:
+        ready(listener.sockets[0].getsockname()[1])
+    async with listener:
+        await listener.serve_forever()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the game to many clients over TCP")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, lambda port: print(f"Listening on {args.host}:{port}", flush=True)))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,122 @@
+# Exact expectimax over the whole game: values[round][state] is the best expected
+# final score from `state` at the start of `round`, before that round's offer is drawn.
+import time
+
+import numpy as np
+
+from core import CAP, ROUNDS, START_RESOURCES, COLLECT, TRADE, apply_action, can_collect, can_trade
+
+BASE = CAP + 1
+N_RESOURCES = len(START_RESOURCES)
+STATES = BASE ** N_RESOURCES
+PLACE = BASE ** np.arange(N_RESOURCES)
+POLICY_FILE = "policy.npy"
+
+CHUNK = 1024
+
+# Every (trade_from, trade_to, trade_amount, trade_to_amount) the generator can produce
+TRADES = np.array([(f, t, a, b) for f in range(N_RESOURCES) for t in range(N_RESOURCES) if t != f
+                   for a in range(1, 4) for b in range(2, 5)])
+TRADE_FROM, TRADE_TO, TRADE_AMOUNT, TRADE_TO_AMOUNT = TRADES.T
+TRADE_DELTA = TRADE_TO_AMOUNT * PLACE[TRADE_TO] - TRADE_AMOUNT * PLACE[TRADE_FROM]
+
+def encode(resources):
+    return int(np.dot(resources, PLACE))
+
+def decode(indices):
+    return (np.asarray(indices)[..., None] // PLACE) % BASE
+
+# Successor indices for collecting each resource (n, 5) and for each trade in TRADES (n, 180).
+# Impossible moves point at `missing`.
+def successors(digits, indices, missing=STATES):
+    collect = np.where(digits < CAP, indices[:, None] + PLACE, missing)
+    legal = (digits[:, TRADE_FROM] >= TRADE_AMOUNT) & (digits[:, TRADE_TO] + TRADE_TO_AMOUNT <= CAP)
+    trade = np.where(legal, indices[:, None] + TRADE_DELTA, missing)
+    return collect, trade
+
+def reachable_states():
+    levels = [None, np.array([encode(START_RESOURCES)])]
+    for _ in range(ROUNDS):
+        indices = levels[-1]
+        seen = np.zeros(STATES + 1, dtype=bool)
+        for start in range(0, len(indices), CHUNK):
+            chunk = indices[start:start + CHUNK]
+            collect, trade = successors(decode(chunk), chunk)
+            seen[collect] = True
+            seen[trade] = True
+        levels.append(np.flatnonzero(seen[:STATES]))
+    return levels
+
+# Probability of each trade under the generator before rejection: trade_from is uniform over
+# non-empty resources, trade_to over the other four, then both amounts uniformly
+def trade_weights(digits):
+    non_empty = (digits > 0).sum(axis=1)[:, None]
+    with np.errstate(divide="ignore"):
+        per_source = 1.0 / (non_empty * (N_RESOURCES - 1) * np.minimum(3, digits) * 3)
+    return np.where(digits[:, TRADE_FROM] >= TRADE_AMOUNT, per_source[:, TRADE_FROM], 0.0)
+
+def expected_values(nxt_values, indices):
+    # nxt_values has one extra trailing slot of -1 standing in for impossible moves
+    digits = decode(indices)
+    collect, trade = successors(digits, indices)
+    collect_values = nxt_values[collect]
+    trade_values = nxt_values[trade]
+    weights = trade_weights(digits)
+
+    # Sum over the uniformly drawn collect resource of the better option
+    best = np.zeros_like(trade_values)
+    for c in range(N_RESOURCES):
+        best += np.maximum(collect_values[:, c, None], trade_values)
+
+    # Offers where both options are impossible are redrawn, so they drop out of the
+    # expectation; each one added exactly -1 to `best` above
+    rejected = (collect_values < 0).sum(axis=1)[:, None] * (trade_values < 0)
+    total = np.einsum("ij,ij->i", weights, best + rejected)
+    mass = N_RESOURCES * weights.sum(axis=1) - np.einsum("ij,ij->i", weights, rejected)
+    return total / mass
+
+def solve(levels=None):
+    if levels is None:
+        levels = reachable_states()
+    values = np.zeros((ROUNDS + 2, STATES))
+    values[ROUNDS + 1] = (decode(np.arange(STATES)) ** 2).sum(axis=1)
+
+    for round_num in range(ROUNDS, 0, -1):
+        nxt_values = np.append(values[round_num + 1], -1.0)
+        indices = levels[round_num]
+        for start in range(0, len(indices), CHUNK):
+            chunk = indices[start:start + CHUNK]
+            values[round_num, chunk] = expected_values(nxt_values, chunk)
+
+    return values
+
+def save_policy(values, path=POLICY_FILE):
+    np.save(path, values.astype(np.float32))
+
+def load_policy(path=POLICY_FILE, mmap=True):
+    return np.load(path, mmap_mode="r" if mmap else None)
+
+def action_values(values, round_num, resources, offer):
+    result = {}
+    for action, legal in ((COLLECT, can_collect), (TRADE, can_trade)):
+        if legal(resources, offer):
+            result[action] = float(values[round_num + 1, encode(apply_action(resources, offer, action))])
+    return result
+
+# O(1): the optimal choice is whichever successor has the higher value; ties go to collecting
+def best_action(values, round_num, resources, offer):
+    scored = action_values(values, round_num, resources, offer)
+    return max(scored, key=lambda action: (scored[action], action == COLLECT))
+
+def optimal_policy(values):
+    return lambda state, actions: best_action(values, state.round, state.resources, state.offer)
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    levels = reachable_states()
+    values = solve(levels)
+    elapsed = time.perf_counter() - start
+    save_policy(values)
+    print(f"Solved {sum(len(level) for level in levels[1:ROUNDS + 1])} states in {elapsed:.2f}s")
+    print(f"Optimal expected score: {values[1, encode(START_RESOURCES)]:.4f}")
+    print(f"Value table written to {POLICY_FILE}")
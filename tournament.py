@@ -0,0 +1,110 @@
+# Plays every policy on the same seeded games, sharded across worker processes
+import argparse
+import importlib
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch import run
+from policies import POLICIES
+
+DEFAULT_POLICIES = ["greedy", "always_collect", "balanced", "random"]
+Z_95 = 1.959963984540054
+
+# "name" from POLICIES, or "package.module:function" for a user-supplied policy
+def resolve_policy(spec):
+    if spec in POLICIES:
+        return POLICIES[spec]
+    module, _, name = spec.partition(":")
+    if not name:
+        raise ValueError(f"unknown policy {spec!r}; use one of {sorted(POLICIES)} or module:function")
+    return getattr(importlib.import_module(module), name)
+
+# Every policy replays the same seed for a shard, so game i sees the same random
+# numbers under each policy. Returns running sums rather than raw scores.
+def play_shard(specs, games, seed, shard):
+    scores = []
+    for spec in specs:
+        shard_seed = np.random.SeedSequence(seed, spawn_key=(shard,))
+        scores.append(run(resolve_policy(spec), games, shard_seed).astype(np.float64))
+    scores = np.array(scores)
+    differences = scores[:, None, :] - scores[None, :, :]
+    return {
+        "games": games,
+        "sum": scores.sum(axis=1),
+        "sum_sq": (scores ** 2).sum(axis=1),
+        "diff_sum": differences.sum(axis=2),
+        "diff_sum_sq": (differences ** 2).sum(axis=2),
+    }
+
+def merge(totals, shard):
+    if totals is None:
+        return dict(shard)
+    return {key: totals[key] + shard[key] for key in totals}
+
+# The variance and interval are NaN for a single game
+def mean_and_interval(total, total_sq, n):
+    mean = total / n
+    if n < 2:
+        return mean, math.nan, math.nan
+    variance = max(0.0, (total_sq - n * mean * mean) / (n - 1))
+    return mean, variance, Z_95 * math.sqrt(variance / n)
+
+def tournament(specs, games, seed=0, workers=None, shards=None):
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers * 4
+    sizes = [games // shards + (i < games % shards) for i in range(shards)]
+
+    totals = None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_shard, specs, size, seed, shard)
+                   for shard, size in enumerate(sizes) if size]
+        for future in futures:
+            totals = merge(totals, future.result())
+    return totals
+
+def report(specs, totals):
+    n = totals["games"]
+    print(f"{'policy':<20}{'mean':>10}{'variance':>12}{'95% CI':>20}")
+    stats = []
+    for i, spec in enumerate(specs):
+        mean, variance, half = mean_and_interval(totals["sum"][i], totals["sum_sq"][i], n)
+        stats.append((mean, variance))
+        print(f"{spec:<20}{mean:>10.3f}{variance:>12.2f}{f'[{mean - half:.3f}, {mean + half:.3f}]':>20}")
+
+    print()
+    print(f"{'paired difference':<36}{'mean':>10}{'95% CI':>22}{'var. reduction':>16}")
+    for i in range(len(specs)):
+        for j in range(i + 1, len(specs)):
+            mean, variance, half = mean_and_interval(totals["diff_sum"][i, j], totals["diff_sum_sq"][i, j], n)
+            # How many times fewer games the pairing needs than independent samples would
+            independent = stats[i][1] + stats[j][1]
+            reduction = independent / variance if variance else math.inf
+            print(f"{specs[i] + ' - ' + specs[j]:<36}{mean:>10.3f}"
+                  f"{f'[{mean - half:.3f}, {mean + half:.3f}]':>22}{reduction:>15.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare policies on common random numbers")
+    parser.add_argument("policies", nargs="*", default=DEFAULT_POLICIES,
+                        help=f"policy names ({', '.join(sorted(POLICIES))}) or module:function")
+    parser.add_argument("-n", "--games", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--shards", type=int, help="work units (default: 4 per worker)")
+    args = parser.parse_args()
+    if args.games < 2:
+        parser.error("need at least 2 games for a confidence interval")
+
+    for spec in args.policies:
+        resolve_policy(spec)
+
+    start = time.perf_counter()
+    totals = tournament(args.policies, args.games, args.seed, args.workers, args.shards)
+    elapsed = time.perf_counter() - start
+    report(args.policies, totals)
+    print()
+    print(f"{args.games:,} games x {len(args.policies)} policies in {elapsed:.2f}s "
+          f"({args.games * len(args.policies) / elapsed:,.0f} games/s)")
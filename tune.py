@@ -0,0 +1,276 @@
+# Tunes a parameterized heuristic policy for the highest mean final score under the rules in batch.
+#
+# Each generation samples candidates around the current mean: a Gaussian evolution strategy in
+# the cross-entropy style, whose mean and spread move to the best quarter of each generation.
+# Candidates are raced by successive halving. All of them play the same few seeded games, the
+# best third go on to three times as many, and so on, so weak candidates are dropped after a
+# few thousand games and the budget goes to the close calls. Everyone in a rung plays the same
+# games, so candidates are compared on common random numbers. Games are played in shards
+# across all cores, and the search is saved after every generation so it can be resumed.
+#
+# A race winner's score is optimistic, since it won on those very games. So each generation's
+# winner is also played on a fixed validation set the races never see, and it replaces the best
+# so far only if it scores higher there, on the same games the best was scored on.
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch import N_RESOURCES, OFFER_AMOUNT, OFFER_COLLECT, OFFER_FROM, OFFER_TO, OFFER_TO_AMOUNT, run
+from core import CAP, COLLECT, ROUNDS, TRADE
+from policies import square_gains
+
+TUNE_FILE = "tune.json"
+VERSION = 2
+SHARD_GAMES = 4096
+VALIDATION_GAMES = 16 * SHARD_GAMES
+# Generation numbers for the seeds of the validation games and of the final test in the CLI
+VALIDATION_KEY = 1 << 30
+TEST_KEY = VALIDATION_KEY + 1
+ETA = 3
+MIN_SPREAD = 0.01
+
+# name, starting value, starting spread, lower and upper bound. The start is plain greedy.
+PARAMETERS = (
+    ("trade_weight", 1.0, 0.3, 0.0, 3.0),
+    ("trade_bias", 0.0, 4.0, -40.0, 40.0),
+    ("late_bias", 0.0, 4.0, -40.0, 40.0),
+    ("hoard_threshold", 9.0, 1.0, 5.0, float(CAP)),
+    ("hoard_penalty", 0.0, 4.0, -40.0, 40.0),
+    ("spread_weight", 0.0, 0.1, -1.0, 1.0),
+)
+NAMES = [name for name, *_ in PARAMETERS]
+START, SPREAD, LOWER, UPPER = (np.array(column) for column in list(zip(*PARAMETERS))[1:])
+
+# Scores both options and takes the higher:
+#   collect: its square gain
+#   trade:   trade_weight * its square gain + trade_bias, plus late_bias scaled from 0 in the
+#            first round to 1 in the last
+# Each option also loses hoard_penalty per resource it takes to hoard_threshold or beyond
+# (close to the cap, where collecting that resource stops being possible), and
+# spread_weight times how much more uneven it leaves the stock.
+def heuristic(params):
+    trade_weight, trade_bias, late_bias, threshold, hoard_penalty, spread_weight = params
+
+    def policy(games):
+        collect_gain, trade_gain = square_gains(games)
+        offers = games.offers
+        held = games.held(offers[:, OFFER_COLLECT])
+        given = games.held(offers[:, OFFER_FROM])
+        got = games.held(offers[:, OFFER_TO])
+        amount, to_amount = offers[:, OFFER_AMOUNT], offers[:, OFFER_TO_AMOUNT]
+        collect_hoard = (held + 1 >= threshold) & (held < threshold)
+        trade_hoard = ((got + to_amount >= threshold) & (got < threshold)).astype(np.int8) - \
+            ((given - amount < threshold) & (given >= threshold))
+
+        r = games.resources.astype(np.int16)
+        squares, total = (r * r).sum(axis=1), r.sum(axis=1)
+        spread = N_RESOURCES * squares - total ** 2
+        collect_spread = N_RESOURCES * (squares + collect_gain) - (total + 1) ** 2 - spread
+        trade_spread = N_RESOURCES * (squares + trade_gain) - (total - amount + to_amount) ** 2 - spread
+
+        progress = (np.minimum(games.round, ROUNDS) - 1) / (ROUNDS - 1)
+        collect_score = collect_gain - hoard_penalty * collect_hoard - spread_weight * collect_spread
+        trade_score = trade_weight * trade_gain + trade_bias + late_bias * progress \
+            - hoard_penalty * trade_hoard - spread_weight * trade_spread
+        return np.where(trade_score > collect_score, TRADE, COLLECT)
+    return policy
+
+# (sum, sum of squares) of one candidate's scores over one shard of a generation's games; every
+# candidate gets the same games for the same (generation, shard)
+def play_shard(params, seed, generation, shard):
+    shard_seed = np.random.SeedSequence(seed, spawn_key=(generation, shard))
+    scores = run(heuristic(params), SHARD_GAMES, shard_seed).astype(np.float64)
+    return scores.sum(), (scores ** 2).sum()
+
+# Successive halving over one generation's candidates. Rung r plays min_games * ETA**r games;
+# after each rung only the best 1/ETA carry on. Returns per-candidate score sums, sums of
+# squares and games played.
+def race(pool, candidates, seed, generation, min_games, rungs):
+    n = len(candidates)
+    sums, sums_sq = np.zeros(n), np.zeros(n)
+    games = np.zeros(n, dtype=np.int64)
+    alive = np.arange(n)
+    shards_done = 0
+    for rung in range(rungs):
+        shards = math.ceil(min_games * ETA ** rung / SHARD_GAMES)
+        tasks = [(i, shard) for i in alive for shard in range(shards_done, shards)]
+        results = pool.map(play_shard, [candidates[i] for i, _ in tasks], [seed] * len(tasks),
+                           [generation] * len(tasks), [shard for _, shard in tasks])
+        for (i, _), (total, total_sq) in zip(tasks, results):
+            sums[i] += total
+            sums_sq[i] += total_sq
+            games[i] += SHARD_GAMES
+        shards_done = shards
+        if rung < rungs - 1:
+            means = sums[alive] / games[alive]
+            alive = alive[np.argsort(-means, kind="stable")[:max(1, math.ceil(len(alive) / ETA))]]
+    return sums, sums_sq, games
+
+# (mean, standard error) of one candidate over the first `games` games seeded by key
+def evaluate(pool, params, seed, key, games):
+    shards = math.ceil(games / SHARD_GAMES)
+    results = list(pool.map(play_shard, [params] * shards, [seed] * shards, [key] * shards, range(shards)))
+    n = shards * SHARD_GAMES
+    mean = float(sum(total for total, _ in results)) / n
+    variance = float(sum(total_sq for _, total_sq in results)) / n - mean ** 2
+    return mean, math.sqrt(max(variance, 0.0) / n)
+
+# Candidates that got further come first, then by mean score
+def ranking(sums, games):
+    return sorted(range(len(sums)), key=lambda i: (-games[i], -sums[i] / games[i]))
+
+def new_search(seed, population, min_games, rungs, validation_games=VALIDATION_GAMES):
+    return {
+        "version": VERSION,
+        "settings": {"seed": seed, "population": population, "min_games": min_games, "rungs": rungs,
+                     "validation_games": validation_games},
+        "generation": 0,
+        "mean": START.tolist(),
+        "spread": SPREAD.tolist(),
+        "best": None,
+        "history": [],
+    }
+
+def save_search(search, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(search, f, indent=1)
+    os.replace(tmp_path, path)
+
+def load_search(path):
+    with open(path) as f:
+        search = json.load(f)
+    if search.get("version") != VERSION:
+        raise ValueError(f"{path} was written by a different version of tune.py")
+    return search
+
+# Runs one generation and updates the search in place. The current mean always races as
+# candidate 0, so it is judged on the same games as the new samples.
+def step(search, pool):
+    settings = search["settings"]
+    generation = search["generation"]
+    mean, spread = np.array(search["mean"]), np.array(search["spread"])
+    rng = np.random.default_rng(np.random.SeedSequence(settings["seed"], spawn_key=(generation, 1 << 20)))
+    samples = mean + spread * rng.standard_normal((settings["population"] - 1, len(PARAMETERS)))
+    candidates = np.clip(np.vstack([mean, samples]), LOWER, UPPER)
+
+    start = time.perf_counter()
+    sums, sums_sq, games = race(pool, candidates, settings["seed"], generation, settings["min_games"], settings["rungs"])
+    order = ranking(sums, games)
+
+    # Log-rank weighted recombination of the best quarter; the spread follows theirs, never
+    # shrinking below MIN_SPREAD of each parameter's range
+    elite = order[:max(2, settings["population"] // 4)]
+    weights = np.log(len(elite) + 0.5) - np.log(np.arange(1, len(elite) + 1))
+    weights /= weights.sum()
+    new_mean = weights @ candidates[elite]
+    deviation = np.sqrt(weights @ (candidates[elite] - new_mean) ** 2)
+    search["mean"] = new_mean.tolist()
+    search["spread"] = np.maximum(0.5 * spread + 0.5 * deviation, MIN_SPREAD * (UPPER - LOWER)).tolist()
+
+    winner = order[0]
+    validation, stderr = evaluate(pool, candidates[winner], settings["seed"], VALIDATION_KEY,
+                                  settings["validation_games"])
+    improved = search["best"] is None or validation > search["best"]["score"]
+    if improved:
+        search["best"] = {"params": dict(zip(NAMES, candidates[winner].tolist())), "score": validation,
+                          "stderr": stderr, "games": math.ceil(settings["validation_games"] / SHARD_GAMES) * SHARD_GAMES,
+                          "generation": generation}
+    search["history"].append({
+        "generation": generation,
+        "winner": float(sums[winner] / games[winner]),
+        "validation": validation,
+        "incumbent": float(sums[0] / games[0]),
+        "incumbent_games": int(games[0]),
+        "games": int(games.sum()),
+        "seconds": time.perf_counter() - start,
+        "improved": improved,
+    })
+    search["generation"] = generation + 1
+    return search["history"][-1]
+
+# Generations since the best score last improved
+def stale_generations(search):
+    stale = 0
+    for entry in reversed(search["history"]):
+        if entry["improved"]:
+            break
+        stale += 1
+    return stale
+
+def tune(search, generations, path=TUNE_FILE, workers=None, patience=None, verbose=True):
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        while search["generation"] < generations:
+            entry = step(search, pool)
+            save_search(search, path)
+            if verbose:
+                print(f"generation {entry['generation']:>3}: winner {entry['winner']:.3f} "
+                      f"(validation {entry['validation']:.3f}), incumbent {entry['incumbent']:.3f} "
+                      f"({entry['games']:,} games, {entry['seconds']:.1f}s)"
+                      f"{'  new best' if entry['improved'] else ''}")
+            if patience and stale_generations(search) >= patience:
+                if verbose:
+                    print(f"No improvement in {patience} generations; stopping")
+                break
+    return search
+
+# The best heuristic saved in a checkpoint, as a BatchGames policy
+def tuned_policy(path=TUNE_FILE):
+    best = load_search(path)["best"]
+    return heuristic([best["params"][name] for name in NAMES])
+
+# tuned_policy() for python3 tournament.py greedy tune:tuned. It reads the checkpoint named by
+# the TUNE_FILE environment variable, or tune.json; tournament workers inherit the variable.
+_tuned = None
+
+def tuned(games):
+    global _tuned
+    if _tuned is None:
+        _tuned = tuned_policy(os.environ.get("TUNE_FILE", TUNE_FILE))
+    return _tuned(games)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search for heuristic policy weights")
+    parser.add_argument("-g", "--generations", type=int, default=30, help="total generations to run")
+    parser.add_argument("-p", "--population", type=int, default=24, help="candidates per generation")
+    parser.add_argument("--min-games", type=int, default=SHARD_GAMES, help="games per candidate in the first rung")
+    parser.add_argument("--rungs", type=int, default=4, help=f"successive halving rounds (games grow {ETA}x each)")
+    parser.add_argument("--validation-games", type=int, default=VALIDATION_GAMES,
+                        help="fixed held-out games each generation's winner is scored on")
+    parser.add_argument("--patience", type=int, help="stop after this many generations without a new best")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("-o", "--output", default=TUNE_FILE, help="checkpoint file")
+    parser.add_argument("--resume", action="store_true", help="continue the search saved in the checkpoint")
+    args = parser.parse_args()
+
+    if args.resume:
+        search = load_search(args.output)
+        print(f"Resuming at generation {search['generation']} with {search['settings']}")
+    else:
+        if args.population < 2 or args.rungs < 1 or args.min_games < 1 or args.validation_games < 1:
+            parser.error("need a population of at least 2, one rung and one game")
+        search = new_search(args.seed, args.population, args.min_games, args.rungs, args.validation_games)
+
+    start = time.perf_counter()
+    tune(search, args.generations, args.output, args.workers, args.patience)
+    elapsed = time.perf_counter() - start
+    best = search["best"]
+    print(f"Best validation score {best['score']:.3f} +/- {best['stderr']:.3f} over {best['games']:,} games "
+          f"(generation {best['generation']}) in {elapsed:.1f}s")
+    # The best was picked on the validation games too, so only games nothing was chosen on give a
+    # fair figure
+    params = [best["params"][name] for name in NAMES]
+    with ProcessPoolExecutor(max_workers=args.workers or os.cpu_count() or 1) as pool:
+        settings = search["settings"]
+        test, test_stderr = evaluate(pool, params, settings["seed"], TEST_KEY, settings["validation_games"])
+    print(f"On {best['games']:,} fresh test games: {test:.3f} +/- {test_stderr:.3f}")
+    for name in NAMES:
+        print(f"  {name:<16}{best['params'][name]:>10.3f}")
+    prefix = "" if args.output == TUNE_FILE else f"TUNE_FILE={args.output} "
+    print(f"Saved to {args.output}; compare it with {prefix}python3 tournament.py greedy tune:tuned")
@@ -0,0 +1,447 @@
+# Variants of the game: any number of resources, cap, rounds, trade ranges and score exponent.
+#
+# A state is one integer: cap.bit_length() bits per resource count with the round in the bits
+# above them, so the states of a round are a flat sorted uint64 array and a value table is a
+# float32 array next to it, looked up with searchsorted. Reachable states, solving and
+# simulation all work through those arrays a chunk at a time, and with a directory the tables
+# are written to .npy files and memory-mapped rather than held in memory.
+#
+# Ruleset() is the game in core.py.
+import json
+import os
+import time
+
+import numpy as np
+
+from core import CAP, ROUNDS, START_RESOURCES
+
+RULES_FILE = "rules.json"
+# Successor cells (states x successors) worked on at once; 2 MB of uint64 stays in cache
+CHUNK_CELLS = 1 << 18
+# Games simulated at once
+CHUNK = 65536
+# Distinct successors held in separate runs before they are merged
+MERGE_LIMIT = 1 << 25
+# Variants with at most this many resource combinations look values up in a dense array
+DENSE_LIMIT = 1 << 26
+MISSING = np.uint64(np.iinfo(np.uint64).max)
+
+class Ruleset:
+    def __init__(self, resources=len(START_RESOURCES), cap=CAP, rounds=ROUNDS, start=None,
+                 trade_amounts=(1, 3), trade_to_amounts=(2, 4), exponent=2):
+        if start is None:
+            start = (START_RESOURCES + (0,) * resources)[:resources]
+        self.resources = resources
+        self.cap = cap
+        self.rounds = rounds
+        self.start = tuple(start)
+        self.trade_amounts = tuple(trade_amounts)
+        self.trade_to_amounts = tuple(trade_to_amounts)
+        self.exponent = exponent
+
+        low, high = self.trade_amounts
+        to_low, to_high = self.trade_to_amounts
+        if resources < 2 or cap < 1 or rounds < 1:
+            raise ValueError("need at least two resources, a cap of 1 and one round")
+        if len(self.start) != resources or not all(0 <= amount <= cap for amount in self.start):
+            raise ValueError(f"start must be {resources} amounts between 0 and {cap}")
+        if not 1 <= low <= high or not 1 <= to_low <= to_high:
+            raise ValueError("trade ranges must be 1 <= low <= high")
+        if not exponent > 0:
+            raise ValueError("the score exponent must be positive")
+        # Something has to be tradeable from the start, and whatever a trade hands out stays
+        # tradeable, so every offer has a resource to give
+        if max(self.start) < low or to_low < low:
+            raise ValueError("the start and trade_to_amounts must leave a resource with trade_amounts[0]")
+        # With every resource full no offer is possible and the generator would never stop
+        if sum(self.start) + rounds * max(1, to_high - low) >= resources * cap:
+            raise ValueError("these rules can fill every resource, leaving no possible offer")
+
+        self.bits = cap.bit_length()
+        self.round_shift = resources * self.bits
+        if self.round_shift + (rounds + 1).bit_length() > 63:
+            raise ValueError("a state doesn't fit in 63 bits")
+        self.mask = np.uint64((1 << self.bits) - 1)
+        self.resource_mask = np.uint64((1 << self.round_shift) - 1)
+        self.shifts = np.arange(resources, dtype=np.uint64) * np.uint64(self.bits)
+        self.units = np.uint64(1) << self.shifts
+        self.round_unit = np.uint64(1 << self.round_shift)
+
+        # Every (trade_from, trade_to, trade_amount, trade_to_amount) the generator can produce
+        trades = np.array([(f, t, a, b) for f in range(resources) for t in range(resources) if t != f
+                           for a in range(low, high + 1) for b in range(to_low, to_high + 1)])
+        self.trade_from, self.trade_to, self.trade_amount, self.trade_to_amount = trades.T
+        # What each trade adds to a state; unsigned, so a loss wraps around and adding it subtracts
+        self.trade_delta = self.trade_to_amount.astype(np.uint64) * self.units[self.trade_to] - \
+            self.trade_amount.astype(np.uint64) * self.units[self.trade_from]
+        self.digit_type = np.int16 if cap + to_high < 1 << 15 else np.int64
+
+    def __repr__(self):
+        return f"Ruleset({', '.join(f'{key}={value!r}' for key, value in self.to_dict().items())})"
+
+    def to_dict(self):
+        return {"resources": self.resources, "cap": self.cap, "rounds": self.rounds, "start": list(self.start),
+                "trade_amounts": list(self.trade_amounts), "trade_to_amounts": list(self.trade_to_amounts),
+                "exponent": self.exponent}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def pack(self, resources, round_num):
+        code = round_num << self.round_shift
+        for amount, shift in zip(resources, self.shifts):
+            code |= amount << int(shift)
+        return np.uint64(code)
+
+    def unpack(self, code):
+        digits = self.digits(np.array([code], dtype=np.uint64))[0]
+        return tuple(int(amount) for amount in digits), int(code) >> self.round_shift
+
+    # (m, resources) counts of an array of states
+    def digits(self, codes):
+        return ((codes[:, None] >> self.shifts) & self.mask).astype(self.digit_type)
+
+    def score(self, digits):
+        return np.power(digits, self.exponent, dtype=np.float64).sum(axis=1)
+
+    # Next-round states for collecting each resource (m, resources) and for every trade in the
+    # trade table (m, trades); impossible moves are MISSING
+    def successors(self, codes, digits):
+        codes = codes + self.round_unit
+        collect = np.where(digits < self.cap, codes[:, None] + self.units, MISSING)
+        legal = (digits[:, self.trade_from] >= self.trade_amount) & \
+                (digits[:, self.trade_to] + self.trade_to_amount <= self.cap)
+        trade = np.where(legal, codes[:, None] + self.trade_delta, MISSING)
+        return collect, trade
+
+    # Probability of each trade in the table before rejection: trade_from is uniform over the
+    # resources holding at least trade_amounts[0], trade_to over the others, then both amounts
+    # uniformly, the first capped at what is held
+    def trade_weights(self, digits):
+        low, high = self.trade_amounts
+        to_low, to_high = self.trade_to_amounts
+        sources = (digits >= low).sum(axis=1)[:, None]
+        held = digits[:, self.trade_from]
+        amounts = np.minimum(high, held) - low + 1
+        with np.errstate(divide="ignore"):
+            weights = 1.0 / (sources * (self.resources - 1) * amounts * (to_high - to_low + 1))
+        return np.where(held >= self.trade_amount, weights, 0.0)
+
+    # Offers as in core.draw_offer_rejection, as an (m, 5) array in core's column order; only
+    # the rows where both options came out impossible are drawn again
+    def draw_offers(self, digits, rng):
+        low, high = self.trade_amounts
+        to_low, to_high = self.trade_to_amounts
+        offers = np.empty((len(digits), 5), dtype=np.int64)
+        rows = np.arange(len(digits))
+        while len(rows):
+            held = digits[rows]
+            at = np.arange(len(rows))
+            u = rng.random((5, len(rows)))
+            collect = pick(u[0], self.resources)
+            sources = held >= low
+            nth = pick(u[1], sources.sum(axis=1))
+            trade_from = np.argmax(np.cumsum(sources, axis=1) > nth[:, None], axis=1)
+            trade_to = pick(u[2], self.resources - 1)
+            trade_to += trade_to >= trade_from
+            top = np.minimum(high, held[at, trade_from])
+            trade_amount = low + pick(u[3], top - low + 1)
+            trade_to_amount = to_low + pick(u[4], to_high - to_low + 1)
+            offers[rows] = np.stack((collect, trade_from, trade_to, trade_amount, trade_to_amount), axis=1)
+
+            impossible = (held[at, collect] >= self.cap) & (held[at, trade_to] + trade_to_amount > self.cap)
+            rows = rows[impossible]
+        return offers
+
+    def legal_collect(self, digits, offers):
+        return digits[np.arange(len(digits)), offers[:, 0]] < self.cap
+
+    def legal_trade(self, digits, offers):
+        at = np.arange(len(digits))
+        return (digits[at, offers[:, 1]] >= offers[:, 3]) & (digits[at, offers[:, 2]] + offers[:, 4] <= self.cap)
+
+    # Next states after collecting (trade False) or trading (trade True) on each offer
+    def advance(self, codes, offers, trade):
+        collect = self.units[offers[:, 0]]
+        swap = offers[:, 4].astype(np.uint64) * self.units[offers[:, 2]] - \
+            offers[:, 3].astype(np.uint64) * self.units[offers[:, 1]]
+        return codes + self.round_unit + np.where(trade, swap, collect)
+
+# A uniform draw from range(k) out of a uniform in [0, 1), per element
+def pick(u, k):
+    return np.minimum((u * k).astype(np.int64), np.asarray(k) - 1)
+
+# The values of a set of states, looked up in the sorted keys of their round; missing is -1
+def lookup(keys, values, codes):
+    index = np.searchsorted(keys, codes)
+    np.minimum(index, len(keys) - 1, out=index)
+    return np.where(keys[index] == codes, values[index], -1.0)
+
+# One round's values for many lookups. Small variants spread them over a dense array indexed
+# by the resource bits, which is much faster than searching; big ones search the sorted keys.
+class ValueTable:
+    def __init__(self, rules, keys, values):
+        self.rules = rules
+        self.keys = keys
+        self.values = values
+        self.dense = None
+        if 1 << rules.round_shift <= DENSE_LIMIT:
+            # The extra last slot stands in for MISSING
+            self.dense = np.full((1 << rules.round_shift) + 1, -1.0, dtype=np.float32)
+            self.dense[np.asarray(keys) & rules.resource_mask] = values
+
+    def __call__(self, codes):
+        if self.dense is None:
+            return lookup(self.keys, self.values, codes)
+        index = np.where(codes == MISSING, np.uint64(len(self.dense) - 1), codes & self.rules.resource_mask)
+        return self.dense[index].astype(np.float64)
+
+# A new .npy file of the given shape when solving to disk, an array otherwise
+def new_table(directory, name, length, dtype):
+    if directory is None:
+        return np.empty(length, dtype=dtype)
+    return np.lib.format.open_memmap(os.path.join(directory, name), mode="w+", dtype=dtype, shape=(length,))
+
+# Sorted distinct values; np.unique hashes integers, which is far slower than sorting them
+def sorted_unique(codes):
+    codes = np.sort(codes)
+    keep = np.empty(len(codes), dtype=bool)
+    keep[:1] = True
+    np.not_equal(codes[1:], codes[:-1], out=keep[1:])
+    return codes[keep]
+
+# keys[round] is the sorted array of states that can be reached at the start of that round.
+# Small variants mark successors in a dense array; big ones sort and merge runs of them.
+def reachable_states(rules, directory=None):
+    keys = [None, np.array([rules.pack(rules.start, 1)], dtype=np.uint64)]
+    dense = 1 << rules.round_shift <= DENSE_LIMIT
+    step = max(1, CHUNK_CELLS // (rules.resources + len(rules.trade_from)))
+    for round_num in range(1, rules.rounds + 1):
+        level = keys[round_num]
+        seen = np.zeros(1 << rules.round_shift, dtype=bool) if dense else None
+        runs, held = [], 0
+        for start in range(0, len(level), step):
+            codes = np.asarray(level[start:start + step])
+            for found in rules.successors(codes, rules.digits(codes)):
+                found = found[found != MISSING]
+                if dense:
+                    seen[found & rules.resource_mask] = True
+                else:
+                    runs.append(sorted_unique(found))
+                    held += len(runs[-1])
+            if held > MERGE_LIMIT:
+                runs = [sorted_unique(np.concatenate(runs))]
+                held = len(runs[0])
+        if dense:
+            merged = np.flatnonzero(seen).astype(np.uint64) | rules.round_unit * np.uint64(round_num + 1)
+        else:
+            merged = sorted_unique(np.concatenate(runs))
+        table = new_table(directory, f"keys_{round_num + 1}.npy", len(merged), np.uint64)
+        table[:] = merged
+        del merged, runs, seen
+        keys.append(table)
+    if directory is not None:
+        np.save(os.path.join(directory, "keys_1.npy"), keys[1])
+    return keys
+
+# Exact expectation over every offer, as in solver.expected_values
+def expected_values(rules, codes, table):
+    digits = rules.digits(codes)
+    collect, trade = rules.successors(codes, digits)
+    collect_values = table(collect)
+    trade_values = table(trade)
+    weights = rules.trade_weights(digits)
+
+    best = np.zeros_like(trade_values)
+    for c in range(rules.resources):
+        best += np.maximum(collect_values[:, c, None], trade_values)
+    # Offers where both options are impossible are redrawn; each added exactly -1 to best
+    rejected = (collect_values < 0).sum(axis=1)[:, None] * (trade_values < 0)
+    total = np.einsum("ij,ij->i", weights, best + rejected)
+    mass = rules.resources * weights.sum(axis=1) - np.einsum("ij,ij->i", weights, rejected)
+    return total / mass
+
+# The mean over `samples` drawn offers instead, for variants with too many trades to enumerate
+# Biased upwards: each state keeps the better of two noisy estimates for every draw, so the
+# noise that favours one option is counted as value. Play the solution to score it fairly.
+def sampled_values(rules, codes, table, samples, rng):
+    codes = np.repeat(codes, samples)
+    digits = rules.digits(codes)
+    offers = rules.draw_offers(digits, rng)
+    collect_values = np.where(rules.legal_collect(digits, offers),
+                              table(rules.advance(codes, offers, False)), -1.0)
+    trade_values = np.where(rules.legal_trade(digits, offers),
+                            table(rules.advance(codes, offers, True)), -1.0)
+    return np.maximum(collect_values, trade_values).reshape(-1, samples).mean(axis=1)
+
+# Backward induction from the final round. values[round][i] is the expected final score of
+# keys[round][i] before that round's offer is drawn; with samples it is an estimate.
+def solve(rules, samples=None, directory=None, seed=0, keys=None):
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, RULES_FILE), "w") as f:
+            json.dump(rules.to_dict(), f)
+    if keys is None:
+        keys = reachable_states(rules, directory)
+    rng = np.random.default_rng(seed)
+    values = [None] * (rules.rounds + 2)
+
+    last = keys[rules.rounds + 1]
+    values[-1] = new_table(directory, f"values_{rules.rounds + 1}.npy", len(last), np.float32)
+    step = CHUNK_CELLS // rules.resources
+    for start in range(0, len(last), step):
+        values[-1][start:start + step] = rules.score(rules.digits(np.asarray(last[start:start + step])))
+
+    per_state = samples * rules.resources if samples else rules.resources * (1 + len(rules.trade_from))
+    step = max(1, CHUNK_CELLS // per_state)
+    for round_num in range(rules.rounds, 0, -1):
+        level = keys[round_num]
+        values[round_num] = new_table(directory, f"values_{round_num}.npy", len(level), np.float32)
+        table = ValueTable(rules, keys[round_num + 1], values[round_num + 1])
+        for start in range(0, len(level), step):
+            codes = np.asarray(level[start:start + step])
+            if samples:
+                chunk = sampled_values(rules, codes, table, samples, rng)
+            else:
+                chunk = expected_values(rules, codes, table)
+            values[round_num][start:start + step] = chunk
+    if directory is not None:
+        for table in values[1:]:
+            table.flush()
+    return Solution(rules, keys, values)
+
+class Solution:
+    def __init__(self, rules, keys, values):
+        self.rules = rules
+        self.keys = keys
+        self.values = values
+        self.tables = {}
+
+    @property
+    def states(self):
+        return sum(len(level) for level in self.keys[1:])
+
+    def value(self, round_num, resources):
+        code = np.array([self.rules.pack(resources, round_num)], dtype=np.uint64)
+        return float(lookup(self.keys[round_num], self.values[round_num], code)[0])
+
+    def expected_score(self):
+        return self.value(1, self.rules.start)
+
+    # Vectorized policy for simulate(): the option whose successor is worth more; ties collect
+    def policy(self, rules, round_num, codes, digits, offers, rng):
+        table = self.tables.get(round_num + 1)
+        if table is None:
+            table = self.tables[round_num + 1] = ValueTable(rules, self.keys[round_num + 1], self.values[round_num + 1])
+        collect = np.where(rules.legal_collect(digits, offers), table(rules.advance(codes, offers, False)), -1.0)
+        trade = np.where(rules.legal_trade(digits, offers), table(rules.advance(codes, offers, True)), -1.0)
+        return trade > collect
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, RULES_FILE), "w") as f:
+            json.dump(self.rules.to_dict(), f)
+        for round_num in range(1, self.rules.rounds + 2):
+            np.save(os.path.join(directory, f"keys_{round_num}.npy"), self.keys[round_num])
+            np.save(os.path.join(directory, f"values_{round_num}.npy"), self.values[round_num])
+
+def load_solution(directory, mmap=True):
+    with open(os.path.join(directory, RULES_FILE)) as f:
+        rules = Ruleset.from_dict(json.load(f))
+    mode = "r" if mmap else None
+    keys = [None] + [np.load(os.path.join(directory, f"keys_{r}.npy"), mmap_mode=mode) for r in range(1, rules.rounds + 2)]
+    values = [None] + [np.load(os.path.join(directory, f"values_{r}.npy"), mmap_mode=mode) for r in range(1, rules.rounds + 2)]
+    return Solution(rules, keys, values)
+
+# Policies for simulate() return, per game, whether to trade; impossible choices fall back
+def random_policy(rules, round_num, codes, digits, offers, rng):
+    return rng.random(len(codes)) < 0.5
+
+def always_collect(rules, round_num, codes, digits, offers, rng):
+    return np.zeros(len(codes), dtype=bool)
+
+# The option adding more to the score right now
+def greedy(rules, round_num, codes, digits, offers, rng):
+    at = np.arange(len(codes))
+    power = lambda x: np.power(x, rules.exponent, dtype=np.float64)
+    held = digits[at, offers[:, 0]]
+    given, got = digits[at, offers[:, 1]], digits[at, offers[:, 2]]
+    collect_gain = power(held + 1) - power(held)
+    trade_gain = power(got + offers[:, 4]) - power(got) + power(np.maximum(given - offers[:, 3], 0)) - power(given)
+    return trade_gain > collect_gain
+
+POLICIES = {"random": random_policy, "greedy": greedy, "always_collect": always_collect}
+
+# Final scores of n games, played CHUNK at a time with states as packed integers
+def simulate(rules, policy, n, seed=None, chunk=CHUNK):
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    scores = np.empty(n, dtype=np.float64)
+    starts = range(0, n, chunk)
+    for start, chunk_seed in zip(starts, seed.spawn(len(starts))):
+        offer_rng, policy_rng = (np.random.default_rng(s) for s in chunk_seed.spawn(2))
+        codes = np.full(min(chunk, n - start), rules.pack(rules.start, 1), dtype=np.uint64)
+        for round_num in range(1, rules.rounds + 1):
+            digits = rules.digits(codes)
+            offers = rules.draw_offers(digits, offer_rng)
+            trade = np.asarray(policy(rules, round_num, codes, digits, offers, policy_rng), dtype=bool)
+            trade = (trade & rules.legal_trade(digits, offers)) | ~rules.legal_collect(digits, offers)
+            codes = rules.advance(codes, offers, trade)
+        scores[start:start + len(codes)] = rules.score(rules.digits(codes))
+    return scores
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Solve or simulate a variant of the game")
+    parser.add_argument("command", choices=("solve", "simulate"))
+    parser.add_argument("--resources", type=int, default=len(START_RESOURCES))
+    parser.add_argument("--cap", type=int, default=CAP)
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--start", type=lambda text: tuple(int(x) for x in text.split(",")),
+                        help="starting amounts, comma-separated (default 2,2,0,...)")
+    parser.add_argument("--trade-amounts", type=int, nargs=2, default=(1, 3), metavar=("LOW", "HIGH"))
+    parser.add_argument("--trade-to-amounts", type=int, nargs=2, default=(2, 4), metavar=("LOW", "HIGH"))
+    parser.add_argument("--exponent", type=float, default=2.0)
+    parser.add_argument("--samples", type=int, help="solve: estimate each state from this many offers")
+    parser.add_argument("--out", metavar="DIR", help="solve: write memory-mapped tables here")
+    parser.add_argument("--solution", metavar="DIR", help="simulate: play the solved policy from DIR")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="greedy")
+    parser.add_argument("-n", "--games", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    exponent = int(args.exponent) if args.exponent.is_integer() else args.exponent
+    try:
+        rules = Ruleset(args.resources, args.cap, args.rounds, args.start, args.trade_amounts,
+                        args.trade_to_amounts, exponent)
+    except ValueError as error:
+        parser.error(str(error))
+
+    start = time.perf_counter()
+    if args.command == "solve":
+        solution = solve(rules, args.samples, args.out, args.seed)
+        elapsed = time.perf_counter() - start
+        kind = f"estimated from {args.samples} offers per state" if args.samples else "exact"
+        print(f"Solved {solution.states:,} states in {elapsed:.2f}s ({kind})")
+        if args.samples:
+            print(f"Estimated expected score: {solution.expected_score():.4f} (optimistic)")
+            # Offers the solver never drew, so the policy is scored without the estimate's bias
+            scores = simulate(rules, solution.policy, args.games, np.random.SeedSequence(args.seed, spawn_key=(1,)))
+            print(f"Played on {args.games:,} held-out games: {scores.mean():.4f} "
+                  f"+/- {scores.std() / np.sqrt(args.games):.4f}")
+        else:
+            print(f"Optimal expected score: {solution.expected_score():.4f}")
+        if args.out:
+            print(f"Tables written to {args.out}")
+    else:
+        if args.solution:
+            solution = load_solution(args.solution)
+            rules, policy, name = solution.rules, solution.policy, "optimal"
+        else:
+            policy, name = POLICIES[args.policy], args.policy
+        scores = simulate(rules, policy, args.games, args.seed)
+        elapsed = time.perf_counter() - start
+        print(f"{args.games:,} games in {elapsed:.2f}s ({args.games / elapsed:,.0f} games/s), "
+              f"{name} mean score {scores.mean():.3f}")
@@ -0,0 +1,124 @@
+# Checks claimed scores by re-simulating submitted games (seed + actions) under the core rules.
+# Only the seed and the actions are trusted from a submission; offers are regenerated here.
+import os
+import random
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from core import COLLECT, ROUNDS, START_RESOURCES, apply_action, can_collect, can_trade, draw_offer, score
+from replay import LOG_SUFFIX, read_log
+
+# A batch file is a run of fixed-size records: seed, actions as bits (round 1 lowest), claimed score
+SUBMISSION = struct.Struct("<QHH")
+BATCH_SUFFIX = ".subs"
+CHUNK = 4096
+POLL_SECONDS = 1.0
+
+def pack_actions(actions):
+    return sum(action << i for i, action in enumerate(actions))
+
+def unpack_actions(bits):
+    return [bits >> i & 1 for i in range(ROUNDS)]
+
+# Written aside and renamed like replay.write_log, so the watcher never sees half a batch
+def write_batch(path, submissions):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"".join(SUBMISSION.pack(seed, bits, claimed) for seed, bits, claimed in submissions))
+    os.replace(tmp_path, path)
+
+def read_batch(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) % SUBMISSION.size:
+        raise ValueError(f"{path}: not a whole number of submissions")
+    return list(SUBMISSION.iter_unpack(data))
+
+# Returns None when the claim holds, otherwise the reason it was rejected
+def verify_game(seed, action_bits, claimed):
+    rng = random.Random(seed)
+    resources = START_RESOURCES
+    for round_num in range(1, ROUNDS + 1):
+        offer = draw_offer(resources, rng)
+        action = action_bits >> (round_num - 1) & 1
+        if not (can_collect if action == COLLECT else can_trade)(resources, offer):
+            return f"illegal action in round {round_num}"
+        resources = apply_action(resources, offer, action)
+    if action_bits >> ROUNDS:
+        return "more actions than rounds"
+    actual = score(resources)
+    return None if actual == claimed else f"claimed {claimed}, replay scores {actual}"
+
+def verify_batch(submissions):
+    return [verify_game(*submission) for submission in submissions]
+
+# Splits large batches into chunks for a process pool; small ones are checked in-process
+def verify_many(submissions, workers=None, chunk=CHUNK):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(submissions) <= chunk:
+        return verify_batch(submissions)
+    chunks = [submissions[start:start + chunk] for start in range(0, len(submissions), chunk)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [reason for results in pool.map(verify_batch, chunks) for reason in results]
+
+def log_submission(path):
+    log = read_log(path)
+    if len(log.rounds) != ROUNDS:
+        raise ValueError(f"{path}: game stopped after {len(log.rounds)} rounds")
+    return log.seed, pack_actions(log.actions), log.score
+
+# Verifies everything waiting in the queue directory: session logs and batch files. Each file is
+# moved to accepted/ or rejected/ (a batch is rejected if any game in it is), and the reasons
+# go to rejected/<file>.txt. Returns the number of games checked and how many failed.
+def process_queue(directory, workers=None):
+    failures = {}
+    submissions, owners = [], []
+    for name in sorted(os.listdir(directory)):
+        # Files still being written end in .tmp and are picked up once renamed
+        if not name.endswith((LOG_SUFFIX, BATCH_SUFFIX)):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            batch = read_batch(path) if name.endswith(BATCH_SUFFIX) else [log_submission(path)]
+        except (OSError, ValueError) as error:
+            failures[name] = [f"unreadable: {error}"]
+            continue
+        failures[name] = []
+        submissions += batch
+        owners += [(name, index) for index in range(len(batch))]
+
+    rejected = 0
+    for (name, index), submission, reason in zip(owners, submissions, verify_many(submissions, workers)):
+        if reason:
+            rejected += 1
+            failures[name].append(f"#{index} seed {submission[0]}: {reason}")
+
+    for name, reasons in failures.items():
+        outcome = os.path.join(directory, "rejected" if reasons else "accepted")
+        os.makedirs(outcome, exist_ok=True)
+        os.replace(os.path.join(directory, name), os.path.join(outcome, name))
+        if reasons:
+            with open(os.path.join(outcome, name + ".txt"), "w") as f:
+                f.write("\n".join(reasons) + "\n")
+    return len(submissions), rejected
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Verify submitted games waiting in a queue directory")
+    parser.add_argument("queue", help=f"directory of {LOG_SUFFIX} session logs and {BATCH_SUFFIX} batch files")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--watch", action="store_true", help="keep polling the directory for new files")
+    args = parser.parse_args()
+
+    while True:
+        start = time.perf_counter()
+        games, rejected = process_queue(args.queue, args.workers)
+        if games:
+            elapsed = time.perf_counter() - start
+            print(f"{games - rejected:,} accepted, {rejected:,} rejected in {elapsed:.2f}s "
+                  f"({games / elapsed:,.0f} games/s)", flush=True)
+        if not args.watch:
+            break
+        time.sleep(POLL_SECONDS)